@@ -0,0 +1,314 @@
+"""
+Cache backends for the event scheduler.
+
+``TieredCache`` puts a small per-process LocMemCache (L1) in front of a cache
+shared by every worker (L2, Redis or ``LockingFileBasedCache``, see settings).
+Reads are served from L1 when possible, writes and deletes go to both tiers,
+and keys whose staleness would be a correctness problem (version counters,
+throttle buckets) skip L1 entirely. It also counts hits and misses per key
+family and periodically adds them to counters in the shared tier, which is
+what ``manage.py cache_stats`` reports.
+"""
+import atexit
+import os
+import pickle
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.functional import cached_property
+
+STATS_PREFIX = "cache_stats"
+STATS_FAMILIES_KEY = f"{STATS_PREFIX}:families"
+_MISSING = object()
+
+
+def key_family(key):
+    # event_detail_view_12_v3 -> event_detail_view, event_participants_5 -> event_participants
+    return re.sub(r"_?\d.*$", "", key) or key
+
+
+def stats_key(family, counter):
+    return f"{STATS_PREFIX}:{family}:{counter}"
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache whose add() and incr() are atomic across the processes of one host.
+
+    The stock versions are a has_key() + set() and a get() + set(), so two
+    workers can both win the same recompute lock or lose a version bump, and
+    incr() also rewrites the key with the default timeout. Here both run under
+    an exclusive lock on a file in the cache directory, and incr() keeps the
+    expiry the key already had (version keys never expire).
+    """
+
+    LOCK_FILE = "atomic.lock"  # no .djcache suffix, so clear() and culling leave it alone
+
+    @contextmanager
+    def _atomic(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.LOCK_FILE), "ab") as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._atomic():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._atomic():
+            try:
+                with open(self._key_to_file(key, version), "rb") as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError("Key '%s' not found" % key)
+            if expiry is not None and expiry < time.time():
+                raise ValueError("Key '%s' not found" % key)
+            new_value = value + delta
+            self.set(key, new_value, None if expiry is None else max(expiry - time.time(), 1), version)
+            return new_value
+
+
+class CacheStats:
+    """
+    Per-process hit/miss counters, added to the shared tier every
+    ``flush_every`` lookups, at most ``flush_interval`` seconds after a lookup
+    (on a timer thread, so quiet processes report too) and at exit.
+    """
+
+    COUNTERS = ("hits", "local_hits", "misses")
+
+    def __init__(self, flush_every=200, flush_interval=10):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._shared = None
+        atexit.register(self._flush_at_exit)
+
+    def record(self, key, counter):
+        with self._lock:
+            family_counts = self._counts.setdefault(key_family(key), dict.fromkeys(self.COUNTERS, 0))
+            family_counts[counter] += 1
+            self._pending += 1
+
+    def due(self):
+        return self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush_later(self, shared):
+        with self._lock:
+            self._shared = shared
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush, args=(shared,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_at_exit(self):
+        if self._shared is not None:
+            self.flush(self._shared)
+
+    def flush(self, shared):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._pending = 0
+            self._last_flush = time.monotonic()
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if not counts:
+            return
+
+        families = set(shared.get(STATS_FAMILIES_KEY) or ())
+        if not set(counts) <= families:
+            shared.set(STATS_FAMILIES_KEY, sorted(families | set(counts)), timeout=None)
+        for family, family_counts in counts.items():
+            for counter, value in family_counts.items():
+                if not value:
+                    continue
+                key = stats_key(family, counter)
+                try:
+                    shared.incr(key, value)
+                except ValueError:
+                    if not shared.add(key, value, timeout=None):
+                        shared.incr(key, value)
+
+
+def read_stats(shared):
+    """{family: {"hits", "local_hits", "misses"}} as accumulated in the shared tier."""
+    families = shared.get(STATS_FAMILIES_KEY) or []
+    keys = [stats_key(family, counter) for family in families for counter in CacheStats.COUNTERS]
+    values = shared.get_many(keys)
+    return {
+        family: {counter: values.get(stats_key(family, counter), 0) for counter in CacheStats.COUNTERS}
+        for family in families
+    }
+
+
+def reset_stats(shared):
+    families = shared.get(STATS_FAMILIES_KEY) or []
+    shared.delete_many([stats_key(family, counter) for family in families for counter in CacheStats.COUNTERS])
+    shared.delete(STATS_FAMILIES_KEY)
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def _process_stats():
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = CacheStats()
+        return _stats
+
+
+class TieredCache(BaseCache):
+    """
+    OPTIONS:
+        LOCAL: alias of the per-process cache (default "local")
+        SHARED: alias of the cache shared by all workers (default "shared")
+        LOCAL_TIMEOUT: seconds an entry may be served from L1 (default 5)
+        LOCAL_EXCLUDE_PREFIXES: keys starting with these never use L1
+        STATS: count hits/misses per key family (default True)
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._local_alias = options.get("LOCAL", "local")
+        self._shared_alias = options.get("SHARED", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.local_exclude = tuple(options.get("LOCAL_EXCLUDE_PREFIXES", ()))
+        # one set of counters per process, caches[] builds an instance per thread
+        self.stats = _process_stats() if options.get("STATS", True) else None
+
+    @cached_property
+    def local(self):
+        return caches[self._local_alias]
+
+    @cached_property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _use_local(self, key):
+        return self.local_timeout and not key.startswith(self.local_exclude)
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _record(self, key, counter):
+        if self.stats is None or key.startswith(STATS_PREFIX):
+            return
+        self.stats.record(key, counter)
+        if self.stats.due():
+            self.stats.flush(self.shared)
+        else:
+            self.stats.flush_later(self.shared)
+
+    def flush_stats(self):
+        if self.stats is not None:
+            self.stats.flush(self.shared)
+
+    def get(self, key, default=None, version=None):
+        if self._use_local(key):
+            value = self.local.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self._record(key, "local_hits")
+                self._record(key, "hits")
+                return value
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record(key, "misses")
+            return default
+        self._record(key, "hits")
+        if self._use_local(key):
+            self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = {}
+        local_keys = [key for key in keys if self._use_local(key)]
+        if local_keys:
+            found = self.local.get_many(local_keys, version=version)
+            for key in found:
+                self._record(key, "local_hits")
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_shared = self.shared.get_many(missing, version=version)
+            backfill = {key: value for key, value in from_shared.items() if self._use_local(key)}
+            if backfill:
+                self.local.set_many(backfill, self.local_timeout, version=version)
+            found.update(from_shared)
+
+        for key in keys:
+            self._record(key, "hits" if key in found else "misses")
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self._use_local(key):
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        local_data = {key: value for key, value in data.items() if self._use_local(key) and key not in failed}
+        if local_data:
+            self.local.set_many(local_data, self._local_timeout(timeout), version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self._use_local(key):
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._use_local(key):
+            self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # counters live in the shared tier only, L1 would hand out stale numbers
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        if self._use_local(key) and self.local.has_key(key, version=version):
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.local.close(**kwargs)
+        self.shared.close(**kwargs)
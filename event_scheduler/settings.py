@@ -53,20 +53,48 @@ INSTALLED_APPS = [
     'corsheaders'
 ]
 
+# JWT_CACHED_USER=true resolves the token's user from the cache (JWT_USER_CACHE_TTL seconds,
+# dropped when the user is saved) instead of querying auth_user on every request
+JWT_CACHED_USER = os.environ.get('JWT_CACHED_USER', 'false').lower() == 'true'
+JWT_USER_CACHE_TTL = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication' if JWT_CACHED_USER
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson when installed, the stock JSON renderer otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'events.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # token buckets on login/register (users/throttling.py): <scope>_ip and <scope>_username
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_username': '10/min',
+        'register_ip': '10/min',
+        'register_username': '5/min',
+    },
 }
+
+# Password hashing pool (users/hashing.py): hashes running at once per process,
+# how many more may wait, and for how long before the request gets a 503
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2))
+PASSWORD_HASH_QUEUE = 8
+PASSWORD_HASH_WAIT = 5
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'BLACKLIST_AFTER_ROTATION': True,
+    # blacklist checks on refresh go through the cache (users/blacklist.py)
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CachedTokenRefreshSerializer',
 
 }
+# seconds a "not blacklisted" answer is cached (users/blacklist.py)
+JWT_BLACKLIST_NEGATIVE_TTL = 30
 
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,  # Disable Django login
@@ -131,9 +159,105 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # keep connections between requests, the pragmas below are applied once per connection
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,  # seconds python's sqlite3 waits for a lock
+        },
     }
 }
 
+# SQLITE_WAL=true switches the database to WAL. The journal mode is stored in the database file
+# itself, so it's opt-in: the bundled db.sqlite3 is tracked in git and stays as it is by default.
+# synchronous=NORMAL is only safe with WAL, so it comes with it.
+SQLITE_WAL = os.environ.get('SQLITE_WAL', 'false').lower() == 'true'
+
+# Applied to every new SQLite connection (event_scheduler/sqlite.py)
+SQLITE_PRAGMAS = {
+    **({'journal_mode': 'WAL', 'synchronous': 'NORMAL'} if SQLITE_WAL else {}),
+    'busy_timeout': 20000,  # ms
+    'cache_size': -64000,  # KiB, ~64 MB page cache per connection
+    'mmap_size': 268435456,  # 256 MB
+    'temp_store': 'MEMORY',
+}
+# writes that still hit "database is locked" are retried this many times (retry_on_lock)
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_BACKOFF = 0.05
+
+
+# Caches
+# CACHE_MODE=local  -> one LocMemCache per process (dev default, workers don't share it)
+# CACHE_MODE=tiered -> small per-process L1 in front of a cache shared by every worker:
+#                      Redis when REDIS_URL is set, otherwise a file based stand-in on this host
+#                      (LockingFileBasedCache: atomic add/incr between the workers of this host
+#                      only, use Redis as soon as workers run on more than one machine)
+# `python manage.py cache_stats` reports hit/miss ratios per key family in tiered mode.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_MODE = os.environ.get('CACHE_MODE', 'tiered' if REDIS_URL else 'local')
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'event_scheduler.cache_backends.LockingFileBasedCache',
+        'LOCATION': os.environ.get('SHARED_CACHE_DIR', BASE_DIR / '.cache'),
+    }
+
+LOCAL_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'event-scheduler-local',
+}
+
+if CACHE_MODE == 'tiered':
+    CACHES = {
+        'default': {
+            'BACKEND': 'event_scheduler.cache_backends.TieredCache',
+            'OPTIONS': {
+                'LOCAL': 'local',
+                'SHARED': 'shared',
+                'LOCAL_TIMEOUT': 5,  # seconds another worker's write can go unnoticed in L1
+                # version counters, the token blacklist, cached JWT users and throttle buckets must never be read stale
+                'LOCAL_EXCLUDE_PREFIXES': ['event_version_', 'event_participants_version_', 'jwt_blacklist_', 'jwt_user_', 'throttle_'],
+            },
+        },
+        'local': LOCAL_CACHE,
+        'shared': SHARED_CACHE,
+    }
+else:
+    CACHES = {
+        'default': LOCAL_CACHE,
+    }
+
+
+# Event payload cache TTL. Writes invalidate exactly, so this only bounds how long unread entries stay around
+EVENT_CACHE_TTL = 60 * 60 * 24  # 24 hours
+
+
+# Recurring events
+# Occurrences are generated on the fly. Turn materialization on to keep them in
+# EventOccurrence for a rolling window (extend it daily with `manage.py extend_occurrences`).
+# Occurrences older than the lookback aren't stored and are generated when asked for
+EVENT_MATERIALIZE_OCCURRENCES = os.environ.get('EVENT_MATERIALIZE_OCCURRENCES', 'false').lower() == 'true'
+EVENT_OCCURRENCE_HORIZON_DAYS = 548  # ~18 months
+EVENT_OCCURRENCE_LOOKBACK_DAYS = 30
+EVENT_RECURRENCE_CONFLICT_HORIZON_DAYS = 365
+
+
+# NDJSON import (POST /api/events/import/): lines per transaction
+EVENT_IMPORT_CHUNK_SIZE = 500
+
+
+# Event history
+# EVENT_HISTORY_DELTA=true stores updates as changed fields only, with a full
+# snapshot every EVENT_HISTORY_SNAPSHOT_EVERY records (`manage.py compact_history` rewrites old rows)
+EVENT_HISTORY_DELTA = os.environ.get('EVENT_HISTORY_DELTA', 'false').lower() == 'true'
+EVENT_HISTORY_SNAPSHOT_EVERY = 20
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,58 @@
+"""
+SQLite tuning for the event scheduler.
+
+``configure_connection`` runs on every new SQLite connection (connection_created)
+and applies ``settings.SQLITE_PRAGMAS``: WAL so readers don't block the writer
+and vice versa, synchronous=NORMAL (safe with WAL, no fsync per commit),
+a busy timeout so a writer waits for the lock instead of failing at once, and
+a larger page cache / mmap window. Connections are kept between requests
+(CONN_MAX_AGE), so this happens once per connection rather than per request.
+
+SQLite still allows one writer at a time, and a transaction that started as a
+reader and then writes can fail with "database is locked" without waiting on
+the busy timeout. ``retry_on_lock`` reruns such a write (a whole transaction,
+never a statement inside one) a few times with jittered backoff.
+"""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_LOCK_RETRIES = 5
+DEFAULT_LOCK_BACKOFF = 0.05  # seconds, doubled on every retry
+
+
+@receiver(connection_created, dispatch_uid='event_scheduler.sqlite.configure_connection')
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and 'database is locked' in str(error)
+
+
+def retry_on_lock(fn):
+    """Rerun ``fn`` when SQLite reports the database as locked, unless it ran inside an outer transaction."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        retries = getattr(settings, 'SQLITE_LOCK_RETRIES', DEFAULT_LOCK_RETRIES)
+        backoff = getattr(settings, 'SQLITE_LOCK_BACKOFF', DEFAULT_LOCK_BACKOFF)
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as e:
+                # inside an outer atomic block the work done so far is gone with the rollback
+                if not is_lock_error(e) or attempt >= retries or connection.in_atomic_block:
+                    raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+    return wrapper
@@ -0,0 +1,144 @@
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from event_scheduler.cache_backends import CacheStats, read_stats, reset_stats
+from event_scheduler.sqlite import configure_connection, retry_on_lock
+
+
+class SqlitePragmaTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234, 'cache_size': -2000})
+    def test_pragmas_applied_to_new_connections(self):
+        configure_connection(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone()[0], 1234)
+            self.assertEqual(cursor.execute("PRAGMA cache_size").fetchone()[0], -2000)
+
+    def test_wal_is_opt_in(self):
+        from django.conf import settings
+        self.assertEqual('journal_mode' in settings.SQLITE_PRAGMAS, settings.SQLITE_WAL)
+
+
+@override_settings(SQLITE_LOCK_RETRIES=3, SQLITE_LOCK_BACKOFF=0)
+class RetryOnLockTests(TransactionTestCase):
+    # not TestCase: retry_on_lock doesn't retry inside an atomic block, and TestCase runs every test in one
+
+    def failing(self, error, times):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            if len(calls) <= times:
+                raise error
+            return 'done'
+        return write, calls
+
+    def test_retries_lock_errors(self):
+        write, calls = self.failing(OperationalError('database is locked'), 2)
+        self.assertEqual(write(), 'done')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_the_retries(self):
+        write, calls = self.failing(OperationalError('database is locked'), 10)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.failing(OperationalError('no such table: x'), 1)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_not_retried_inside_an_outer_transaction(self):
+        write, calls = self.failing(OperationalError('database is locked'), 1)
+        with transaction.atomic(), self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+class CacheBackendTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'event_scheduler.cache_backends.TieredCache',
+                'OPTIONS': {'LOCAL_TIMEOUT': 5, 'LOCAL_EXCLUDE_PREFIXES': ['event_version_'], 'STATS': False},
+            },
+            'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'cache-backend-tests'},
+            'shared': {'BACKEND': 'event_scheduler.cache_backends.LockingFileBasedCache', 'LOCATION': self.dir},
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.tiered, self.local, self.shared = caches['default'], caches['local'], caches['shared']
+        self.addCleanup(self.local.clear)
+
+    def test_reads_are_served_from_local(self):
+        self.tiered.set('event_detail_view_1_v1', 'payload', 60)
+        self.shared.delete('event_detail_view_1_v1')
+        self.assertEqual(self.tiered.get('event_detail_view_1_v1'), 'payload')
+
+    def test_excluded_prefixes_skip_local(self):
+        self.tiered.set('event_version_1', 1, None)
+        self.assertIsNone(self.local.get('event_version_1'))
+        self.shared.set('event_version_1', 2, None)
+        self.assertEqual(self.tiered.get('event_version_1'), 2)
+
+    def test_writes_and_deletes_reach_both_tiers(self):
+        self.tiered.set('event_detail_view_1_v1', 'payload', 60)
+        self.assertEqual(self.shared.get('event_detail_view_1_v1'), 'payload')
+        self.tiered.delete('event_detail_view_1_v1')
+        self.assertIsNone(self.local.get('event_detail_view_1_v1'))
+        self.assertIsNone(self.tiered.get('event_detail_view_1_v1'))
+
+    def test_add_and_incr_are_shared(self):
+        self.assertTrue(self.tiered.add('event_version_1', 1, None))
+        self.assertFalse(self.tiered.add('event_version_1', 5, None))
+        self.assertEqual(self.tiered.incr('event_version_1'), 2)
+        self.assertEqual(self.shared.get('event_version_1'), 2)
+
+    def test_file_incr_keeps_the_expiry(self):
+        self.shared.set('forever', 1, None)
+        self.shared.incr('forever')
+        with open(self.shared._key_to_file('forever'), 'rb') as f:
+            self.assertIsNone(pickle.load(f))
+
+        self.shared.set('soon', 1, 100)
+        self.shared.incr('soon', 4)
+        with open(self.shared._key_to_file('soon'), 'rb') as f:
+            self.assertLess(pickle.load(f) - time.time(), 101)
+        self.assertEqual(self.shared.get('soon'), 5)
+        with self.assertRaises(ValueError):
+            self.shared.incr('missing')
+
+    def test_file_add_is_atomic_across_threads(self):
+        won = []
+
+        def race():
+            if self.shared.add('lock', 1, 60):
+                won.append(1)
+        threads = [threading.Thread(target=race) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(won), 1)
+
+    def test_stats_flush_into_shared_counters(self):
+        stats = CacheStats(flush_every=1000, flush_interval=60)
+        stats.record('event_detail_view_1_v1', 'hits')
+        stats.record('event_detail_view_2_v1', 'misses')
+        stats.flush(self.shared)
+        stats.record('event_detail_view_3_v1', 'hits')
+        stats.flush(self.shared)
+        self.assertEqual(read_stats(self.shared), {'event_detail_view': {'hits': 2, 'local_hits': 0, 'misses': 1}})
+        reset_stats(self.shared)
+        self.assertEqual(read_stats(self.shared), {})
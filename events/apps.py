@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'events'
+
+    def ready(self):
+        # connects the history signal handlers
+        from . import history  # noqa: F401
+        # and the SQLite connection setup
+        from event_scheduler import sqlite  # noqa: F401
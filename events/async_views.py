@@ -0,0 +1,113 @@
+# events/async_views.py
+# Async versions of the hot read endpoints (list, detail, participants).
+# DRF views are sync only, so under an ASGI server every request to them takes a
+# thread. These are plain Django async views: the JWT is checked without a
+# thread, rows come from the async ORM and the cache is read with aget/aset, so
+# one worker can keep many slow readers in flight. Responses match the sync
+# endpoints.
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from users.authentication import AsyncJWTAuthentication
+
+from .caching import aget_event_participants, aget_event_version, aget_or_compute, aget_participant_role, event_detail_key
+from .models import Event
+from .serializers import EVENT_ROW_FIELDS, event_row
+from .views import parse_aware_datetime
+
+
+def async_authentication():
+    # the configured class when it can authenticate async (CachedJWTAuthentication does)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, AsyncJWTAuthentication):
+            return authentication_class()
+    return AsyncJWTAuthentication()
+
+
+class AsyncJWTView(View):
+    """Base class: authenticates the bearer token before the (async) handler runs."""
+
+    authentication = async_authentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = await self.authentication.aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed) as e:
+            return JsonResponse(e.detail if isinstance(e.detail, dict) else {"detail": e.detail}, status=401)
+        if authenticated is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = authenticated[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncEventListView(AsyncJWTView):
+    # title / start / end filters and page pagination of GET /api/events/;
+    # cursor pages and recurrence expansion (from/to) stay on the sync endpoint
+
+    async def get(self, request):
+        try:
+            query = Event.objects.filter(eventparticipant__user=request.user)
+
+            title = request.GET.get('title')
+            if title:
+                query = query.filter(title__icontains=title)
+
+            raw_start = request.GET.get('start')
+            raw_end = request.GET.get('end')
+            range_start = parse_aware_datetime(raw_start)
+            range_end = parse_aware_datetime(raw_end)
+            if (raw_start and not range_start) or (raw_end and not range_end):
+                return JsonResponse({"error": "start and end must be valid datetimes"}, status=400)
+            if range_end:
+                query = query.filter(start_time__lt=range_end)
+            if range_start:
+                query = query.filter(end_time__gt=range_start)
+
+            try:
+                page = max(int(request.GET.get('page', 1)), 1)
+            except ValueError:
+                page = 1
+            per_page = max(int(request.GET.get('page_size', 10)), 1)
+
+            count = await query.acount()
+            num_pages = max((count + per_page - 1) // per_page, 1)
+            offset = (page - 1) * per_page
+            rows = query.order_by('start_time', 'id').values_list(*EVENT_ROW_FIELDS)[offset:offset + per_page]
+            data = [event_row(row) async for row in rows] if page <= num_pages else []
+
+            return JsonResponse({
+                "results": data,
+                "count": count,
+                "num_pages": num_pages,
+                "current_page": page,
+            })
+        except Exception as e:
+            return JsonResponse({"error in gettinggg events": str(e)}, status=400)
+
+
+class AsyncEventDetailView(AsyncJWTView):
+
+    async def get(self, request, id):
+        if await aget_participant_role(id, request.user.id) is None:
+            return JsonResponse({"error": "Event not present or unauthorized"}, status=404)
+
+        async def load():
+            return event_row(await Event.objects.filter(id=id).values_list(*EVENT_ROW_FIELDS).aget())
+
+        try:
+            data = await aget_or_compute(event_detail_key(id, await aget_event_version(id)), load)
+        except Event.DoesNotExist:
+            return JsonResponse({"error": "Event not present or unauthorized"}, status=404)
+        return JsonResponse(data)
+
+
+class AsyncEventPermissionListView(AsyncJWTView):
+
+    async def get(self, request, id):
+        if await aget_participant_role(id, request.user.id) is None:
+            if not await Event.objects.filter(id=id).aexists():
+                return JsonResponse({"error": "Event not found"}, status=404)
+            return JsonResponse({"error": "Not authorized to view this event's participants"}, status=403)
+        return JsonResponse({"participants": await aget_event_participants(id)})
@@ -0,0 +1,222 @@
+# events/caching.py
+# Versioned caching of event payloads.
+# Every event has one version key for its payload and one for its participant
+# list. Cached values are stored under a key that contains the current version,
+# so a write only has to bump that single key (on commit) and every stale entry
+# (for every participant) is simply never read again and expires on its own.
+# Payloads don't depend on who asks: access is checked separately with one
+# indexed lookup (get_participant_role), so one entry serves every user.
+#
+# Misses go through get_or_compute(): only one caller per key recomputes (the
+# others wait for it or keep serving the current value), and entries are
+# refreshed a little before they expire with a probability that grows as the
+# expiry gets closer, so a hot key never expires for everybody at once.
+import asyncio
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import EventParticipant
+
+# 24 hours: writes invalidate exactly (version bump / delete), the TTL only evicts entries nobody reads
+EVENT_CACHE_TTL = getattr(settings, 'EVENT_CACHE_TTL', 60 * 60 * 24)
+RECOMPUTE_LOCK_TIMEOUT = 10  # seconds, a crashed recompute frees the key after this
+RECOMPUTE_WAIT = 2  # seconds a caller waits for somebody else's recompute before doing it itself
+EARLY_EXPIRY_BETA = 1.0  # >1 refreshes earlier, <1 later
+
+
+def event_version_key(event_id):
+    return f"event_version_{event_id}"
+
+
+def event_detail_key(event_id, version):
+    return f"event_detail_view_{event_id}_v{version}"
+
+
+def participants_version_key(event_id):
+    return f"event_participants_version_{event_id}"
+
+
+def participants_key(event_id, version):
+    return f"event_participants_{event_id}_v{version}"
+
+
+def _fresh_version():
+    # a lost version key restarts from the clock, never from a number an old entry may still use
+    return int(time.time() * 1000)
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _fresh_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # nothing cached for this key yet (or it was evicted)
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def get_event_version(event_id):
+    return _get_version(event_version_key(event_id))
+
+
+def bump_event_version(event_id):
+    _bump_version(event_version_key(event_id))
+
+
+def bump_event_version_on_commit(event_id):
+    # bumping inside an open transaction would let a reader cache the old row again before the commit
+    transaction.on_commit(lambda: bump_event_version(event_id))
+
+
+def bump_event_versions_on_commit(event_ids):
+    # for bulk writes: one set_many instead of an incr per event, a fresh clock
+    # based version is never one an old entry was stored under (see _fresh_version)
+    keys = [event_version_key(event_id) for event_id in event_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, _fresh_version()), timeout=None))
+
+
+async def aget_event_version(event_id):
+    return await _aget_version(event_version_key(event_id))
+
+
+def bump_participants_version_on_commit(event_id):
+    # same scheme as the event detail: a list loaded before the change was
+    # computed under the old version, so writing it back late can't be read again
+    transaction.on_commit(lambda: _bump_version(participants_version_key(event_id)))
+
+
+def _refresh_due(cost, expires_at):
+    # XFetch: true a little before expiry, more likely the closer it gets and the costlier the value
+    return time.time() - cost * EARLY_EXPIRY_BETA * math.log(1 - random.random()) >= expires_at
+
+
+def _store(key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    cost = time.monotonic() - started
+    cache.set(key, (value, cost, time.time() + timeout), timeout=timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout=EVENT_CACHE_TTL):
+    """
+    Cached value of ``key``, calling ``compute()`` at most once at a time per key.
+
+    Entries remember how long they took to compute. A reader refreshes an entry
+    early when ``now - cost * beta * log(rand)`` passes its expiry (XFetch), so
+    refreshes spread out before the real expiry. Recomputes take a short lock
+    with cache.add(): on a miss the other callers wait for the winner, on an
+    early refresh they just keep returning the current value.
+    """
+    lock_key = f"{key}_lock"
+    entry = cache.get(key)
+    if entry is not None:
+        value, cost, expires_at = entry
+        if not _refresh_due(cost, expires_at):
+            return value
+        if not cache.add(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + RECOMPUTE_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # the lock holder is too slow (or died), compute without it
+        return _store(key, compute, timeout)
+
+    try:
+        return _store(key, compute, timeout)
+    finally:
+        cache.delete(lock_key)
+
+
+async def _astore(key, compute, timeout):
+    started = time.monotonic()
+    value = await compute()
+    cost = time.monotonic() - started
+    await cache.aset(key, (value, cost, time.time() + timeout), timeout=timeout)
+    return value
+
+
+async def aget_or_compute(key, compute, timeout=EVENT_CACHE_TTL):
+    """get_or_compute() for async views: ``compute`` is a coroutine function and waiting doesn't block the loop."""
+    lock_key = f"{key}_lock"
+    entry = await cache.aget(key)
+    if entry is not None:
+        value, cost, expires_at = entry
+        if not _refresh_due(cost, expires_at):
+            return value
+        if not await cache.aadd(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+            return value
+    elif not await cache.aadd(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + RECOMPUTE_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+            entry = await cache.aget(key)
+            if entry is not None:
+                return entry[0]
+        return await _astore(key, compute, timeout)
+
+    try:
+        return await _astore(key, compute, timeout)
+    finally:
+        await cache.adelete(lock_key)
+
+
+def load_event_participants(event_id):
+    """[{"user_id", "username", "role"}] of an event, straight from the db (for writes)."""
+    participants = EventParticipant.objects.filter(event_id=event_id).select_related("user")
+    return [
+        {"user_id": p.user.id, "username": p.user.username, "role": p.role}
+        for p in participants
+    ]
+
+
+def get_event_participants(event_id):
+    """load_event_participants(), cached until a participant changes."""
+    return get_or_compute(participants_key(event_id, _get_version(participants_version_key(event_id))), lambda: load_event_participants(event_id))
+
+
+async def aget_event_participants(event_id):
+    async def load():
+        return [
+            {"user_id": p.user.id, "username": p.user.username, "role": p.role}
+            async for p in EventParticipant.objects.filter(event_id=event_id).select_related("user")
+        ]
+    return await aget_or_compute(participants_key(event_id, await _aget_version(participants_version_key(event_id))), load)
+
+
+def invalidate_participants(event_id):
+    # for bulk writes to EventParticipant, which skip the per-row save hooks (called on commit)
+    _bump_version(participants_version_key(event_id))
+
+
+def get_participant_role(event_id, user_id):
+    # authorization never comes from the cached list: one lookup on the (user, event, role) index
+    return EventParticipant.objects.filter(event_id=event_id, user_id=user_id).values_list("role", flat=True).first()
+
+
+async def aget_participant_role(event_id, user_id):
+    return await EventParticipant.objects.filter(event_id=event_id, user_id=user_id).values_list("role", flat=True).afirst()
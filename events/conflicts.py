@@ -0,0 +1,200 @@
+# events/conflicts.py
+# Conflict detection for events. The db is asked once per check, with a range
+# query on the (start_time, end_time) index covering only the window being
+# checked (plus recurring events, which can repeat into it). The rows are put in
+# a sorted interval index for that request, so checking every occurrence of a
+# recurring event or every item of a batch is a bisect instead of a query each.
+from bisect import bisect_left
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Event
+from .recurrence import compile_rule, conflict_horizon, occurrences, recurrence_of
+from .serializers import format_datetime
+
+class IntervalIndex:
+    """
+    Intervals of one user sorted by start time. ``max_ends[i]`` is the latest
+    end time among the first i+1 intervals, which lets a lookup stop walking
+    back as soon as nothing further left can reach the queried start.
+
+    Recurring events can't be flattened into the sorted list, so they are kept
+    as compiled rules and asked directly (a rule answers in constant time).
+    """
+
+    __slots__ = ("starts", "ends", "event_ids", "max_ends", "recurring")
+
+    def __init__(self, rows):
+        # rows are (start_time, end_time, event_id, pattern), pattern None for one-off events
+        single = sorted(row[:3] for row in rows if row[3] is None)
+        self.starts = [row[0] for row in single]
+        self.ends = [row[1] for row in single]
+        self.event_ids = [row[2] for row in single]
+        self.max_ends = []
+        latest = None
+        for end in self.ends:
+            if latest is None or end > latest:
+                latest = end
+            self.max_ends.append(latest)
+        self.recurring = [
+            (event_id, compile_rule(pattern, start_time, end_time))
+            for start_time, end_time, event_id, pattern in rows if pattern is not None
+        ]
+
+    def __len__(self):
+        return len(self.starts) + len(self.recurring)
+
+    def overlapping(self, start, end, exclude=None):
+        """Ids of the events overlapping the half open interval [start, end)."""
+        hits = []
+        # everything from here on starts at or after `end`, so it can't overlap
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and self.event_ids[i] != exclude:
+                hits.append(self.event_ids[i])
+            i -= 1
+        for event_id, rule in self.recurring:
+            if event_id != exclude and rule.overlaps(start, end):
+                hits.append(event_id)
+        return hits
+
+
+def _aware(value):
+    # naive datetimes are read in the default timezone, like the ORM does
+    if timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def _describe(event, user_ids):
+    return {
+        "id": event["id"],
+        "title": event["title"],
+        "start_time": format_datetime(event["start_time"]),
+        "end_time": format_datetime(event["end_time"]),
+        "user_ids": sorted(user_ids),
+    }
+
+
+def _candidate_occurrences(start_time, end_time, pattern):
+    # a new recurring event is checked occurrence by occurrence up to the horizon
+    if pattern is None:
+        return [(start_time, end_time)]
+    return list(occurrences(start_time, end_time, pattern, start_time, start_time + conflict_horizon()))
+
+
+def _window_events(user_ids, span_start, span_end):
+    # events of the users that can overlap [span_start, span_end): the one-off
+    # ones by range, recurring ones that started before the end by their rule
+    return Event.objects.filter(
+        Q(end_time__gt=span_start) | Q(is_recurring=True),
+        eventparticipant__user_id__in=user_ids,
+        start_time__lt=span_end,
+    )
+
+
+def _index_of(events):
+    return IntervalIndex([
+        (event["start_time"], event["end_time"], event["id"], recurrence_of(event["is_recurring"], event["recurrence_pattern"]))
+        for event in events.values()
+    ])
+
+
+def find_conflicts(user_ids, start_time, end_time, exclude_event_id=None, recurrence_pattern=None):
+    """
+    Events of any of ``user_ids`` overlapping [start_time, end_time).
+
+    Existing recurring events are matched on their expanded occurrences, and
+    when the event being checked repeats itself (``recurrence_pattern``, as
+    returned by recurrence_of) each of its occurrences up to the conflict
+    horizon is checked. Returns a list of dicts (empty when there is no
+    conflict) describing each conflicting event and which of the given users
+    it belongs to.
+    """
+    start_time, end_time = _aware(start_time), _aware(end_time)
+    candidates = _candidate_occurrences(start_time, end_time, recurrence_pattern)
+    if not candidates:
+        return []
+
+    rows = _window_events(user_ids, candidates[0][0], max(occurrence[1] for occurrence in candidates))
+    if exclude_event_id is not None:
+        rows = rows.exclude(id=exclude_event_id)
+    events = {}
+    owners = {}
+    for row in rows.values("id", "title", "start_time", "end_time", "is_recurring", "recurrence_pattern", "eventparticipant__user_id"):
+        events[row["id"]] = row
+        owners.setdefault(row["id"], []).append(row["eventparticipant__user_id"])
+
+    index = _index_of(events)
+    hits = set()
+    for occurrence_start, occurrence_end in candidates:
+        hits.update(index.overlapping(occurrence_start, occurrence_end))
+    return [
+        _describe(events[event_id], owners[event_id])
+        for event_id in sorted(hits, key=lambda event_id: (events[event_id]["start_time"], event_id))
+    ]
+
+
+def find_batch_conflicts(user_id, items):
+    """
+    Conflicts for a batch of new events owned by ``user_id``.
+
+    ``items`` is a list of (key, start_time, end_time, pattern). The batch is
+    sorted once and swept for overlaps between its own items (the earlier item
+    wins), and the user's existing events are read with a single range query
+    covering the whole batch (plus the recurring ones that started before it).
+    Returns {key: {"message": ..., "conflicts": [...]}} for every item that
+    can't be created.
+    """
+    items = sorted(
+        ((key, _aware(start_time), _aware(end_time), pattern) for key, start_time, end_time, pattern in items),
+        key=lambda item: (item[1], item[2]),
+    )
+    if not items:
+        return {}
+
+    candidates = {key: _candidate_occurrences(start_time, end_time, pattern) for key, start_time, end_time, pattern in items}
+    span_start = items[0][1]
+    span_end = max(occurrence[1] for occurrence_list in candidates.values() for occurrence in occurrence_list)
+    existing = {
+        event["id"]: event
+        for event in _window_events([user_id], span_start, span_end).values(
+            "id", "title", "start_time", "end_time", "is_recurring", "recurrence_pattern"
+        )
+    }
+    existing_index = _index_of(existing)
+
+    errors = {}
+    accepted_end = None
+    accepted_key = None
+    accepted_rules = []
+    for key, start_time, end_time, pattern in items:
+        hits = set()
+        for occurrence_start, occurrence_end in candidates[key]:
+            hits.update(existing_index.overlapping(occurrence_start, occurrence_end))
+        if hits:
+            errors[key] = {
+                "message": "User has overlapping event(s) during this time",
+                "conflicts": [_describe(existing[event_id], [user_id]) for event_id in sorted(hits)],
+            }
+            continue
+
+        # sorted by start, so overlapping an accepted one-off item means starting
+        # before the latest accepted end (later occurrences only start later)
+        clash = accepted_key if accepted_end is not None and start_time < accepted_end else None
+        if clash is None:
+            clash = next((
+                rule_key for rule_key, rule in accepted_rules
+                if any(rule.overlaps(occurrence_start, occurrence_end) for occurrence_start, occurrence_end in candidates[key])
+            ), None)
+        if clash is not None:
+            errors[key] = {"message": f"Overlaps item {clash} of this batch", "conflicts": []}
+            continue
+
+        if pattern is not None:
+            accepted_rules.append((key, compile_rule(pattern, start_time, end_time)))
+        elif accepted_end is None or end_time > accepted_end:
+            accepted_end = end_time
+            accepted_key = key
+    return errors
@@ -0,0 +1,104 @@
+# events/export.py
+# Streaming export of a user's events as NDJSON or iCalendar.
+# Rows are read with values().iterator(), so no model instances are built and
+# only one chunk of rows is in memory at a time; recurring events are expanded
+# lazily while writing, one occurrence per line / VEVENT. Memory use doesn't
+# grow with the size of the account.
+import json
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+
+from .models import Event
+from .occurrences import occurrence_horizon
+from .recurrence import occurrences, recurrence_of
+from .serializers import EVENT_ROW_FIELDS, format_datetime
+
+EXPORT_CHUNK_SIZE = 2000
+ICS_PRODID = "-//event-scheduler-backend//events export//EN"
+
+
+def export_rows(user, window_start=None, window_end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """values() rows of every event ``user`` takes part in that can have an occurrence in the window."""
+    query = Event.objects.filter(eventparticipant__user=user)
+    if window_end is not None:
+        query = query.filter(start_time__lt=window_end)
+    if window_start is not None:
+        # recurring events that started earlier can still repeat inside the window
+        query = query.exclude(end_time__lte=window_start, is_recurring=False)
+    return query.order_by('start_time', 'id').values(*EVENT_ROW_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def expand(rows, window_start=None, window_end=None):
+    """
+    Yield (row, start, end) per occurrence. Recurring events are cut off at
+    ``window_end`` or, without one, at the occurrence horizon.
+    """
+    recurring_end = window_end or occurrence_horizon()
+    for row in rows:
+        pattern = recurrence_of(row['is_recurring'], row['recurrence_pattern'])
+        if pattern is None and window_start is None and window_end is None:
+            yield row, row['start_time'], row['end_time']
+            continue
+        for start_time, end_time in occurrences(
+            row['start_time'], row['end_time'], pattern,
+            window_start or row['start_time'], recurring_end if pattern else (window_end or row['end_time']),
+        ):
+            yield row, start_time, end_time
+
+
+def ndjson_lines(occurrence_rows):
+    for row, start_time, end_time in occurrence_rows:
+        yield json.dumps({
+            "id": row['id'],
+            "title": row['title'],
+            "description": row['description'],
+            "start_time": format_datetime(start_time),
+            "end_time": format_datetime(end_time),
+            "location": row['location'],
+            "is_recurring": row['is_recurring'],
+            "recurrence_pattern": row['recurrence_pattern'],
+        }) + "\n"
+
+
+def _ics_text(value):
+    # RFC 5545 TEXT escaping
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _ics_time(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _ics_line(line):
+    # content lines are folded at 75 octets, continuation lines start with a space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # don't split a UTF-8 sequence
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def ics_lines(occurrence_rows):
+    stamp = _ics_time(timezone.now())
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + _ics_line(f"PRODID:{ICS_PRODID}") + "CALSCALE:GREGORIAN\r\n"
+    for row, start_time, end_time in occurrence_rows:
+        yield "".join((
+            "BEGIN:VEVENT\r\n",
+            _ics_line(f"UID:event-{row['id']}-{_ics_time(start_time)}@event-scheduler"),
+            f"DTSTAMP:{stamp}\r\n",
+            f"DTSTART:{_ics_time(start_time)}\r\n",
+            f"DTEND:{_ics_time(end_time)}\r\n",
+            _ics_line(f"SUMMARY:{_ics_text(row['title'])}"),
+            _ics_line(f"DESCRIPTION:{_ics_text(row['description'])}") if row['description'] else "",
+            _ics_line(f"LOCATION:{_ics_text(row['location'])}") if row['location'] else "",
+            "END:VEVENT\r\n",
+        ))
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,79 @@
+# events/freebusy.py
+# Free/busy across several users.
+# One query reads every event of every requested user that can touch the window
+# (recurring ones are expanded in memory), the intervals are sorted once and
+# coalesced into busy blocks, and the gaps between the blocks are the common
+# free time.
+from datetime import timedelta
+
+from django.db.models import Q
+
+from .models import EventParticipant
+from .recurrence import occurrences, recurrence_of
+
+MAX_USERS = 100
+MAX_WINDOW = timedelta(days=366)
+
+
+def coalesce(intervals):
+    """Sorted, non-overlapping (start, end) blocks covering ``intervals``; touching blocks are merged too."""
+    blocks = []
+    for start_time, end_time in sorted(intervals):
+        if blocks and start_time <= blocks[-1][1]:
+            if end_time > blocks[-1][1]:
+                blocks[-1][1] = end_time
+        else:
+            blocks.append([start_time, end_time])
+    return [tuple(block) for block in blocks]
+
+
+def visible_user_ids(user, user_ids):
+    """The ids of ``user_ids`` whose calendar ``user`` may see: themselves and anyone they share an event with."""
+    shared = EventParticipant.objects.filter(
+        user_id__in=user_ids, event__eventparticipant__user=user
+    ).values_list("user_id", flat=True).distinct()
+    return set(shared) | ({user.id} & set(user_ids))
+
+
+def busy_intervals(user_ids, window_start, window_end):
+    """{user_id: [(start, end), ...]} clipped to the window, from a single query."""
+    rows = EventParticipant.objects.filter(
+        Q(event__end_time__gt=window_start) | Q(event__is_recurring=True),
+        user_id__in=user_ids,
+        event__start_time__lt=window_end,
+    ).values_list('user_id', 'event__start_time', 'event__end_time', 'event__is_recurring', 'event__recurrence_pattern')
+
+    busy = {user_id: [] for user_id in user_ids}
+    for user_id, start_time, end_time, is_recurring, recurrence_pattern in rows:
+        pattern = recurrence_of(is_recurring, recurrence_pattern)
+        for occurrence_start, occurrence_end in occurrences(start_time, end_time, pattern, window_start, window_end):
+            busy[user_id].append((max(occurrence_start, window_start), min(occurrence_end, window_end)))
+    return busy
+
+
+def free_slots(busy_blocks, window_start, window_end, duration, limit):
+    """The first ``limit`` back to back slots of ``duration`` in the gaps between ``busy_blocks``."""
+    slots = []
+    cursor = window_start
+    for block_start, block_end in list(busy_blocks) + [(window_end, window_end)]:
+        while cursor + duration <= min(block_start, window_end) and len(slots) < limit:
+            slots.append((cursor, cursor + duration))
+            cursor += duration
+        if len(slots) >= limit:
+            break
+        cursor = max(cursor, block_end)
+    return slots
+
+
+def freebusy(user_ids, window_start, window_end, duration=None, limit=5):
+    """
+    Busy blocks per user and for the whole group, plus (with ``duration``) the
+    first ``limit`` slots in which every user is free.
+    """
+    busy = busy_intervals(user_ids, window_start, window_end)
+    per_user = {user_id: coalesce(intervals) for user_id, intervals in busy.items()}
+    combined = coalesce(interval for blocks in per_user.values() for interval in blocks)
+    result = {"users": per_user, "busy": combined}
+    if duration:
+        result["free_slots"] = free_slots(combined, window_start, window_end, duration, limit)
+    return result
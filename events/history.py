@@ -0,0 +1,352 @@
+# events/history.py
+# Delta encoded event history.
+# Every history record stores what it changed in HistoricalEvent.history_delta
+# ({field: {"from", "to"}}), computed once at write time, which is what the
+# changelog reads. simple-history copies the whole row (description included)
+# on every save; with settings.EVENT_HISTORY_DELTA on, an update also blanks
+# the text columns of its row and relies on the delta alone; every EVENT_HISTORY_SNAPSHOT_EVERY-th record
+# (and every create/delete) is still a full snapshot. A version is rebuilt from
+# the closest snapshot before it plus the deltas in between, so reads never
+# have to walk more than one snapshot interval.
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from simple_history.signals import pre_create_historical_record
+from simple_history.utils import bulk_create_with_history
+
+from .caching import bump_event_versions_on_commit
+from .models import HISTORY_FIELDS, Event, HistoricalEvent
+from .occurrences import refresh_occurrences_bulk
+
+TRACKED_FIELDS = HISTORY_FIELDS
+# the columns a delta row doesn't keep, the fixed size ones stay (and can't be NULL)
+COMPACTED_FIELDS = ('title', 'description', 'location')
+REQUIRED_FIELDS = ('title', 'start_time', 'end_time')  # a version without them is never written back
+DEFAULT_SNAPSHOT_EVERY = 20
+HISTORY_ORDER = ('history_date', 'history_id')
+
+
+class IncompleteHistory(ValueError):
+    """A delta row with no snapshot before it: its text columns can't be rebuilt."""
+
+
+def history_delta_enabled():
+    return getattr(settings, 'EVENT_HISTORY_DELTA', False)
+
+
+def snapshot_every():
+    return max(getattr(settings, 'EVENT_HISTORY_SNAPSHOT_EVERY', DEFAULT_SNAPSHOT_EVERY), 1)
+
+
+def diff_states(old, new):
+    """{field: {"from", "to"}} for the tracked fields that differ between two states (dicts)."""
+    return {
+        field: {"from": old.get(field), "to": new.get(field)}
+        for field in TRACKED_FIELDS
+        if old.get(field) != new.get(field)
+    }
+
+
+def record_state(record):
+    # the tracked fields as stored in the columns of a snapshot row
+    return {field: getattr(record, field) for field in TRACKED_FIELDS}
+
+
+def _apply(state, delta):
+    state = dict(state)
+    for field, change in delta.items():
+        if field in TRACKED_FIELDS:
+            # JSON gives datetimes back as strings, to_python() turns them into datetimes again
+            state[field] = Event._meta.get_field(field).to_python(change["to"])
+    return state
+
+
+def missing_fields(record):
+    """The REQUIRED_FIELDS a (restored) history record has no value for."""
+    return [field for field in REQUIRED_FIELDS if getattr(record, field) in (None, '')]
+
+
+def is_delta(record):
+    return not record.history_is_snapshot and record.history_delta is not None
+
+
+def iter_states(records):
+    """
+    (record, state) for history records of one event in ascending order.
+    The first record has to be a snapshot, IncompleteHistory otherwise: a delta
+    row's blanked text columns are never a state to build on.
+    """
+    state = None
+    for record in records:
+        if not is_delta(record):
+            state = record_state(record)
+        elif state is None:
+            raise IncompleteHistory(f"Version {record.history_id} of event {record.id} has no snapshot to rebuild it from")
+        else:
+            state = _apply(state, record.history_delta)
+        yield record, state
+
+
+def version_state(record):
+    """Tracked fields of the event as of ``record``, rebuilt from the closest snapshot when it is a delta row."""
+    if not is_delta(record):
+        return record_state(record)
+
+    # newest first, down to (and including) the closest snapshot
+    chain = []
+    earlier = HistoricalEvent.objects.filter(id=record.id, history_date__lte=record.history_date).order_by('-history_date', '-history_id')
+    for candidate in earlier.iterator(chunk_size=snapshot_every() + 1):
+        if candidate.history_date == record.history_date and candidate.history_id > record.history_id:
+            continue
+        chain.append(candidate)
+        if not is_delta(candidate):
+            break
+    return list(iter_states(reversed(chain)))[-1][1]
+
+
+def restore(record):
+    """``record`` with its tracked columns filled in as of that version (a no-op for snapshot rows)."""
+    if is_delta(record):
+        for field, value in version_state(record).items():
+            setattr(record, field, value)
+    return record
+
+
+def _snapshot_due(event_id):
+    # no snapshot among the last (N - 1) records: either N - 1 deltas in a row, or
+    # no snapshot at all yet (an event bulk created without history), so nothing to build on
+    recent = HistoricalEvent.objects.filter(id=event_id).order_by('-history_date', '-history_id').values_list(
+        'history_is_snapshot', flat=True
+    )[:snapshot_every() - 1]
+    return not any(recent)
+
+
+def encode_history_record(sender, instance, history_instance, **kwargs):
+    # pre_create_historical_record: store the changed fields, and turn the full copy
+    # into a delta row when that's allowed
+    old = getattr(instance, '_loaded_values', None)
+    if history_instance.history_type != '~':
+        history_instance.history_delta = {}
+    elif old is not None:
+        history_instance.history_delta = diff_states(old, record_state(history_instance))
+
+    if not history_delta_enabled():
+        return
+    if history_instance.history_type != '~' or old is None or _snapshot_due(instance.id):
+        history_instance.history_is_snapshot = True
+        return
+    history_instance.history_is_snapshot = False
+    for field in COMPACTED_FIELDS:
+        setattr(history_instance, field, '')
+
+
+pre_create_historical_record.connect(encode_history_record, sender=HistoricalEvent, dispatch_uid='events.encode_history_record')
+
+
+def bulk_create_events(events, user=None, batch_size=None):
+    """
+    Event.objects.bulk_create() plus the "+" history row save() would have
+    written for each event, in the same transaction. bulk_history_create()
+    doesn't send pre_create_historical_record, so the empty delta a create
+    gets from encode_history_record() is set here.
+    """
+    return bulk_create_with_history(
+        events, Event, batch_size=batch_size, default_user=user, custom_historical_attrs={"history_delta": {}},
+    )
+
+
+def compact_history(event_ids, batch_size=500):
+    """
+    Rewrite the existing history of the given event ids into snapshots plus
+    deltas, keeping every snapshot_every()-th record (and creates/deletes) full.
+    Returns the number of rows rewritten.
+    """
+    compacted = 0
+    every = snapshot_every()
+    for event_id in list(event_ids):
+        records = HistoricalEvent.objects.filter(id=event_id).order_by(*HISTORY_ORDER)
+        changed = []
+        since_snapshot = 0
+        previous_state = None
+        # one event's history at a time, read fully before writing to it
+        try:
+            states = list(iter_states(list(records)))
+        except IncompleteHistory:
+            # it starts with delta rows, there's no full state to compact from
+            continue
+        for record, state in states:
+            keep_full = record.history_type != '~' or previous_state is None or since_snapshot >= every - 1
+            if keep_full:
+                since_snapshot = 0
+                if is_delta(record):
+                    # a run of deltas longer than the current setting gets a snapshot again
+                    for field, value in state.items():
+                        setattr(record, field, value)
+                    record.history_is_snapshot = True
+                    changed.append(record)
+            elif not is_delta(record):
+                record.history_delta = diff_states(previous_state, state)
+                record.history_is_snapshot = False
+                for field in COMPACTED_FIELDS:
+                    setattr(record, field, '')
+                changed.append(record)
+                since_snapshot += 1
+            else:
+                since_snapshot += 1
+            previous_state = state
+
+            if len(changed) >= batch_size:
+                compacted += _save_compacted(changed)
+                changed = []
+        compacted += _save_compacted(changed)
+    return compacted
+
+
+def _save_compacted(records):
+    if records:
+        HistoricalEvent.objects.bulk_update(
+            records, ['history_delta', 'history_is_snapshot', *TRACKED_FIELDS], batch_size=len(records)
+        )
+    return len(records)
+
+
+def changelog_entries(records, previous=None):
+    """
+    (record, changed fields) for ascending history records of one event, from
+    the deltas stored at write time. ``previous`` is the record right before
+    the first one. Rows written before deltas were stored (see backfill_deltas)
+    are full copies and get diffed against the version before them.
+    """
+    for record in records:
+        if record.history_delta is not None or record.history_type == '+' or previous is None:
+            changes = record.history_delta or {}
+        else:
+            changes = diff_states(version_state(previous), record_state(record))
+        yield record, changes
+        previous = record
+
+
+def backfill_deltas(event_ids, batch_size=500):
+    """Store history_delta on the history rows of the given events that don't have one yet. Returns the number of rows."""
+    filled = 0
+    for event_id in list(event_ids):
+        records = HistoricalEvent.objects.filter(id=event_id).order_by(*HISTORY_ORDER)
+        if not records.filter(history_delta__isnull=True).exists():
+            continue
+        changed = []
+        previous_state = None
+        try:
+            states = list(iter_states(list(records)))
+        except IncompleteHistory:
+            continue
+        for record, state in states:
+            if record.history_delta is None:
+                record.history_delta = {} if record.history_type != '~' or previous_state is None else diff_states(previous_state, state)
+                changed.append(record)
+            previous_state = state
+        HistoricalEvent.objects.bulk_update(changed, ['history_delta'], batch_size=batch_size)
+        filled += len(changed)
+    return filled
+
+
+def versions_as_of(event_ids, as_of):
+    """
+    The latest history record at or before ``as_of`` of each event in
+    ``event_ids`` (ids or a subquery), leaving out events that were deleted by
+    then. One query: the history of those events up to ``as_of`` is ranked
+    newest first per event in a single pass, so the cost follows the rows
+    read once instead of a lookup per row. Filters added by the caller apply
+    to the picked versions, not to the ranking.
+    Delta rows still need restore() for their text columns.
+    """
+    latest = HistoricalEvent.objects.filter(
+        id__in=event_ids, history_date__lte=as_of
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=[F('id')], order_by=[F(field).desc() for field in HISTORY_ORDER])
+    ).filter(rank=1).values('history_id')
+    return HistoricalEvent.objects.filter(history_id__in=latest).exclude(history_type='-')
+
+
+def restore_many(records, skip_incomplete=False):
+    """
+    restore() for a batch of records of different events: the delta rows among
+    them are rebuilt from one query over those events' history instead of a
+    query per record. A delta row that can't be rebuilt raises IncompleteHistory,
+    or with ``skip_incomplete`` is left out of the returned list.
+    """
+    deltas = {record.history_id: record for record in records if is_delta(record)}
+    if not deltas:
+        return records
+    history = {}
+    for record in HistoricalEvent.objects.filter(
+        id__in={record.id for record in deltas.values()},
+        history_date__lte=max(record.history_date for record in deltas.values()),
+    ).order_by(*HISTORY_ORDER).iterator(chunk_size=2000):
+        history.setdefault(record.id, []).append(record)
+
+    incomplete = set()
+    for event_id, event_records in history.items():
+        try:
+            for record, state in iter_states(event_records):
+                if record.history_id in deltas:
+                    for field, value in state.items():
+                        setattr(deltas[record.history_id], field, value)
+        except IncompleteHistory:
+            if not skip_incomplete:
+                raise
+            incomplete.add(event_id)
+    if incomplete:
+        return [record for record in records if not (is_delta(record) and record.id in incomplete)]
+    return records
+
+
+def rollback_events(events, versions, user=None):
+    """
+    Put each event of ``events`` back to the state of ``versions[event.id]``
+    (restored history records) with one bulk_update, one bulk insert of
+    history rows and one round of cache invalidation. Events already in that
+    state are left alone. Returns the events that changed.
+
+    Every version has to be checked with missing_fields() first; one without
+    its required fields raises IncompleteHistory before anything is written.
+    """
+    for event in events:
+        missing = missing_fields(versions[event.id])
+        if missing:
+            raise IncompleteHistory(f"Version {versions[event.id].history_id} of event {event.id} has no {', '.join(missing)}")
+    changed = []
+    for event in events:
+        version = versions[event.id]
+        for field in TRACKED_FIELDS:
+            setattr(event, field, getattr(version, field))
+        if event._loaded_values != record_state(event):
+            changed.append(event)
+    if not changed:
+        return changed
+
+    now = timezone.now()
+    rows = []
+    for event in changed:
+        event.updated_at = now  # auto_now only applies in save()
+        rows.append(HistoricalEvent(
+            history_date=now,
+            history_user=user,
+            history_type='~',
+            history_delta=diff_states(event._loaded_values, record_state(event)),
+            history_is_snapshot=True,
+            **{field.attname: getattr(event, field.attname) for field in HistoricalEvent.tracked_fields},
+        ))
+
+    with transaction.atomic():
+        Event.objects.bulk_update(changed, [*TRACKED_FIELDS, 'updated_at'], batch_size=500)
+        HistoricalEvent.objects.bulk_create(rows, batch_size=500)
+        refresh_occurrences_bulk(changed)
+
+    # what Event.save() does per event, once for the whole batch
+    bump_event_versions_on_commit([event.id for event in changed])
+    for event in changed:
+        event._loaded_timing = event.timing()
+        event._loaded_values = record_state(event)
+    return changed
@@ -0,0 +1,170 @@
+# events/importing.py
+# Streaming NDJSON import of events (one JSON object per line, like requests.jsonl).
+# The request body is read line by line and handled in chunks: every chunk is
+# conflict checked with find_batch_conflicts() and committed in its own short
+# transaction, so memory stays flat and SQLite's write lock is only held for one
+# chunk at a time. Progress and per-line errors are streamed back as NDJSON too.
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .conflicts import find_batch_conflicts
+from .history import bulk_create_events
+from .models import Event, EventParticipant
+from .occurrences import materialize_new_events
+from .recurrence import recurrence_of
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_LINE_BYTES = 64 * 1024  # one event is tiny, a longer line is garbage (and is not buffered)
+
+
+def import_chunk_size():
+    return getattr(settings, 'EVENT_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def event_from_data(data):
+    """Unsaved Event from one item of a bulk/import payload, ValueError when it's not usable."""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    title = data.get('title')
+    start_time = data.get('start_time')
+    end_time = data.get('end_time')
+    if not title or not start_time or not end_time:
+        raise ValueError("Missing required fields: title, start_time, end_time")
+    start_time = parse_datetime(start_time)
+    end_time = parse_datetime(end_time)
+    if not start_time or not end_time:
+        raise ValueError("Invalid start_time or end_time")
+
+    recurrence_pattern = data.get('recurrence_pattern')
+    if isinstance(recurrence_pattern, str):
+        # EventView.post takes 'daily' as well (recurrence_of() upper-cases it), so the choices are checked in upper case
+        recurrence_pattern = recurrence_pattern.upper()
+
+    event = Event(
+        title=title,
+        description=data.get('description') or '',
+        start_time=start_time,
+        end_time=end_time,
+        location=data.get('location') or '',
+        is_recurring=data.get('is_recurring', False),
+        recurrence_pattern=recurrence_pattern,
+    )
+    # field checks (lengths, choices, types) here, so one bad item is reported
+    # on its own instead of failing the bulk insert of everything around it
+    try:
+        event.full_clean()
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()))
+    return event
+
+
+def read_ndjson(stream):
+    """(line_number, data, error) for every non blank line of a binary stream, read one line at a time."""
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_LINE_BYTES and not line.endswith(b"\n"):
+            # skip the rest of the oversized line without keeping it around
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_LINE_BYTES)
+            yield line_number, None, "Line too long"
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+
+
+def _create_chunk(user, candidates, chunk_size):
+    """Conflict check and insert of (line_number, event) candidates in one transaction, returns (created, conflicts)."""
+    with transaction.atomic():
+        # earlier chunks are committed already, so the range query sees them
+        conflicts = find_batch_conflicts(
+            user.id,
+            [
+                (line_number, event.start_time, event.end_time, recurrence_of(event.is_recurring, event.recurrence_pattern))
+                for line_number, event in candidates
+            ],
+        )
+        events_to_create = [event for line_number, event in candidates if line_number not in conflicts]
+        # with their "+" history rows, so as_of reads, rollback and the changelog see them
+        created_events = bulk_create_events(events_to_create, user, batch_size=chunk_size)
+        EventParticipant.objects.bulk_create(
+            [EventParticipant(user=user, event=event, role='OWNER') for event in created_events],
+            batch_size=chunk_size,
+        )
+        materialize_new_events(created_events)
+    return created_events, conflicts
+
+
+def _dump(message):
+    return json.dumps(message, default=str) + "\n"
+
+
+def import_events(user, stream, chunk_size=None):
+    """
+    Generator of NDJSON lines reporting the import of ``stream`` for ``user``.
+
+    Yields {"line", "error"[, "conflicts"]} for every rejected line, one
+    {"progress": {...}} per committed chunk and a final {"done": {...}} with
+    the totals. A chunk the db refuses is retried row by row, so only the
+    offending lines fail and committed chunks stay committed.
+    """
+    chunk_size = chunk_size or import_chunk_size()
+    lines = read_ndjson(stream)
+    totals = {"lines": 0, "created": 0, "failed": 0, "chunks": 0}
+
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        totals["lines"] += len(chunk)
+
+        candidates = []
+        for line_number, data, error in chunk:
+            if error is None:
+                try:
+                    candidates.append((line_number, event_from_data(data)))
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            totals["failed"] += 1
+            yield _dump({"line": line_number, "error": error})
+
+        try:
+            created_events, conflicts = _create_chunk(user, candidates, chunk_size)
+        except Exception:
+            # a row the db refused anyway: go through the chunk one row at a
+            # time so only that row fails (earlier rows are seen by the conflict check)
+            created_events, conflicts = [], {}
+            for line_number, event in candidates:
+                event.pk = None
+                event._state.adding = True
+                try:
+                    created, row_conflicts = _create_chunk(user, [(line_number, event)], 1)
+                except Exception as e:
+                    totals["failed"] += 1
+                    yield _dump({"line": line_number, "error": f"Not imported: {e}"})
+                    continue
+                created_events.extend(created)
+                conflicts.update(row_conflicts)
+
+        for line_number in sorted(conflicts):
+            yield _dump({"line": line_number, "error": conflicts[line_number]["message"], "conflicts": conflicts[line_number]["conflicts"]})
+        totals["created"] += len(created_events)
+        totals["failed"] += len(conflicts)
+        totals["chunks"] += 1
+        yield _dump({"progress": dict(totals)})
+
+    yield _dump({"done": totals})
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from events.history import backfill_deltas
+from events.models import HistoricalEvent
+
+
+class Command(BaseCommand):
+    help = "Store the changed fields on history rows written before the changelog kept them (history_delta)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        event_ids = (
+            HistoricalEvent.objects.filter(history_delta__isnull=True)
+            .order_by('id').values_list('id', flat=True).distinct()
+        )
+        filled = backfill_deltas(event_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Stored changes on {filled} history row(s)"))
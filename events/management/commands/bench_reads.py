@@ -0,0 +1,82 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report throughput and latency per path. "
+        "Run it once against the WSGI server and once against the ASGI one, e.g. "
+        "--path /api/events/ --path /api/events/async/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths', help="Path to request, repeatable (default /api/events/)")
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--body', help="JSON body sent with every request")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per path")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=20, help="Untimed requests per path before measuring")
+        parser.add_argument('--token', help="Access token; otherwise --username/--password log in first")
+        parser.add_argument('--username')
+        parser.add_argument('--password')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        token = options['token'] or self.login(base_url, options)
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = options['body'].encode() if options['body'] else None
+
+        def fire(url):
+            request = urllib.request.Request(url, data=body, headers=headers, method=options['method'])
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    ok = response.status < 400
+            except urllib.error.HTTPError as e:
+                e.read()
+                ok = False
+            except OSError:
+                ok = False
+            return ok, time.perf_counter() - started
+
+        self.stdout.write(f"{'path':<40} {'ok':>7} {'failed':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for path in options['paths'] or ['/api/events/']:
+                url = base_url + path
+                list(pool.map(fire, [url] * options['warmup']))
+
+                started = time.perf_counter()
+                results = list(pool.map(fire, [url] * options['requests']))
+                elapsed = time.perf_counter() - started
+
+                latencies = sorted(latency * 1000 for _, latency in results)
+                ok = sum(1 for success, _ in results if success)
+                quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+                self.stdout.write(
+                    f"{path:<40} {ok:>7} {len(results) - ok:>7} {len(results) / elapsed:>9.1f} "
+                    f"{quantiles[49]:>9.1f} {quantiles[94]:>9.1f} {quantiles[98]:>9.1f}"
+                )
+
+    def login(self, base_url, options):
+        if not options['username']:
+            return None
+        payload = json.dumps({"username": options['username'], "password": options['password'] or ""}).encode()
+        request = urllib.request.Request(
+            f"{base_url}/api/auth/login/", data=payload, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                return json.loads(response.read())["access"]
+        except (urllib.error.URLError, KeyError, ValueError) as e:
+            raise CommandError(f"Login failed: {e}")
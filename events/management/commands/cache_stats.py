@@ -0,0 +1,33 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from event_scheduler.cache_backends import TieredCache, read_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Show cache hit/miss ratios per key family (event_detail_view, event_participants, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Clear the counters after printing them")
+
+    def handle(self, *args, **options):
+        cache = caches['default']
+        if not isinstance(cache, TieredCache):
+            raise CommandError("Cache stats are collected by the tiered cache, set CACHE_MODE=tiered")
+
+        stats = read_stats(cache.shared)
+        if not stats:
+            self.stdout.write("No cache lookups recorded yet")
+            return
+
+        self.stdout.write(f"{'family':<30} {'hits':>10} {'local':>10} {'misses':>10} {'hit ratio':>10}")
+        for family, counts in sorted(stats.items()):
+            lookups = counts['hits'] + counts['misses']
+            ratio = counts['hits'] / lookups if lookups else 0
+            self.stdout.write(
+                f"{family:<30} {counts['hits']:>10} {counts['local_hits']:>10} {counts['misses']:>10} {ratio:>10.1%}"
+            )
+
+        if options['reset']:
+            reset_stats(cache.shared)
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from events.history import compact_history, snapshot_every
+from events.models import HistoricalEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite existing event history into periodic full snapshots plus deltas "
+        "(see EVENT_HISTORY_DELTA / EVENT_HISTORY_SNAPSHOT_EVERY)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='event_ids', help="Only this event id, repeatable")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # deleted events keep their history, so ids come from the history table
+        history = HistoricalEvent.objects.all()
+        if options['event_ids']:
+            history = history.filter(id__in=options['event_ids'])
+        event_ids = history.order_by('id').values_list('id', flat=True).distinct()
+
+        rewritten = compact_history(event_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rewrote {rewritten} history row(s), one full snapshot every {snapshot_every()} record(s)"
+        ))
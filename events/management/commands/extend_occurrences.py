@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from events.occurrences import extend_occurrences, materialization_enabled, occurrence_horizon
+
+
+class Command(BaseCommand):
+    help = "Materialize occurrences of recurring events up to the rolling horizon (run daily, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Horizon in days from now (default: EVENT_OCCURRENCE_HORIZON_DAYS)")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not materialization_enabled():
+            raise CommandError("EVENT_MATERIALIZE_OCCURRENCES is off, nothing to extend")
+
+        until = occurrence_horizon(options['days'])
+        created = extend_occurrences(Event.objects.all(), until, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} occurrence(s) up to {until:%Y-%m-%d %H:%M:%S}"))
@@ -1,11 +1,32 @@
 from django.db import models
-from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 
 # Create your models here.
 # events/models.py
 from django.contrib.auth.models import User
 from simple_history.models import HistoricalRecords
 
+TIMING_FIELDS = ("start_time", "end_time", "is_recurring", "recurrence_pattern")
+HISTORY_FIELDS = ("title", "description", "start_time", "end_time", "location", "is_recurring", "recurrence_pattern")
+
+
+class EventHistoryDelta(models.Model):
+    # extra columns of HistoricalEvent, see events/history.py
+    history_delta = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)  # {field: {"from", "to"}}
+    history_is_snapshot = models.BooleanField(default=True)  # False: only history_delta is reliable
+
+    class Meta:
+        abstract = True
+
+
+class EventHistoricalRecords(HistoricalRecords):
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        # "latest version of event X at time T" (as_of reads) is a seek on this index
+        meta_fields["indexes"] = [models.Index(fields=["id", "history_date"])]
+        return meta_fields
+
+
 class Event(models.Model):
     RECURRING_PATTERNS = [
         ('DAILY', 'Daily'),
@@ -24,24 +45,78 @@ class Event(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     participants = models.ManyToManyField(User, through='EventParticipant', related_name='events')
-    history = HistoricalRecords()
+    history = EventHistoricalRecords(bases=[EventHistoryDelta])
+
+    class Meta:
+        indexes = [
+            # time window reads (start/end filters, calendar views)
+            models.Index(fields=['start_time', 'end_time']),
+        ]
 
     def __str__(self):
         return f"{self.title}-{self.location}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so save() can tell whether the timing changed (conflict indexes, occurrences)
+        instance._loaded_timing = tuple(instance.__dict__.get(field) for field in TIMING_FIELDS)
+        # and what changed for the history delta
+        instance._loaded_values = {field: instance.__dict__.get(field) for field in HISTORY_FIELDS}
+        return instance
+
+    def timing(self):
+        return tuple(getattr(self, field) for field in TIMING_FIELDS)
     
     def clear_cache(self):
-        # Invalidate cache for all users who participated in this event
-        for user in self.participants.all():
-            cache_key = f"event_detail_view_{self.id}_user_{user.id}"
-            cache.delete(cache_key)
+        # One version bump invalidates the cached detail for every participant.
+        from .caching import bump_event_version_on_commit
+        bump_event_version_on_commit(self.id)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        from .history import history_delta_enabled
+        from .occurrences import refresh_event_occurrences
+        adding = self._state.adding
+        # in delta history mode a save that changes nothing doesn't add a history row
+        unchanged = not adding and history_delta_enabled() and getattr(self, "_loaded_values", None) == {
+            field: getattr(self, field) for field in HISTORY_FIELDS
+        }
+        if unchanged:
+            self.skip_history_when_saving = True
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            if unchanged:
+                del self.skip_history_when_saving
         self.clear_cache()
+        refresh_event_occurrences(self)
+        self._loaded_timing = self.timing()
+        self._loaded_values = {field: getattr(self, field) for field in HISTORY_FIELDS}
 
     def delete(self, *args, **kwargs):
+        from .caching import bump_participants_version_on_commit
         self.clear_cache()
+        event_id = self.id
         super().delete(*args, **kwargs)
+        # participant rows go with the event through the cascade, without their own hooks
+        bump_participants_version_on_commit(event_id)
+
+
+class EventOccurrence(models.Model):
+    # materialized occurrences of recurring events, only filled when
+    # settings.EVENT_MATERIALIZE_OCCURRENCES is on (see events/occurrences.py)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrences')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'start_time']),
+            models.Index(fields=['start_time', 'end_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} @ {self.start_time}"
 
 
 class EventParticipant(models.Model):
@@ -57,17 +132,23 @@ class EventParticipant(models.Model):
 
     class Meta:
         unique_together = ('user', 'event')
+        indexes = [
+            # covers "events of this user" joins and role checks without touching the table
+            models.Index(fields=['user', 'event', 'role']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} ({self.role}) in {self.event.title}"
     
     def save(self, *args, **kwargs):
+        from .caching import bump_participants_version_on_commit
         super().save(*args, **kwargs)
-        cache.delete(f"event_participants_{self.event_id}")
+        bump_participants_version_on_commit(self.event_id)
 
     def delete(self, *args, **kwargs):
+        from .caching import bump_participants_version_on_commit
         event_id = self.event_id
         super().delete(*args, **kwargs)
-        cache.delete(f"event_participants_{event_id}")
+        bump_participants_version_on_commit(event_id)
 
 
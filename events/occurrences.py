@@ -0,0 +1,156 @@
+# events/occurrences.py
+# Optional materialized occurrences of recurring events.
+# With settings.EVENT_MATERIALIZE_OCCURRENCES on, every recurring event keeps its
+# occurrences in EventOccurrence from a short lookback before now up to a rolling
+# horizon, so a daily event started years ago doesn't store years of rows. Event.save() rebuilds
+# them only when the timing changed, deleting an event cascades, and the
+# extend_occurrences command moves the horizon forward. Range reads then come
+# from the (event, start_time) index and only fall back to generating
+# occurrences before and past the materialized part.
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import EventOccurrence
+from .recurrence import compile_rule, occurrences, recurrence_of
+
+DEFAULT_HORIZON_DAYS = 548  # ~18 months
+DEFAULT_LOOKBACK_DAYS = 30
+
+
+def materialization_enabled():
+    return getattr(settings, 'EVENT_MATERIALIZE_OCCURRENCES', False)
+
+
+def occurrence_horizon(days=None):
+    if days is None:
+        days = getattr(settings, 'EVENT_OCCURRENCE_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+    return timezone.now() + timedelta(days=days)
+
+
+def occurrence_lookback():
+    # occurrences that ended before this aren't stored when an event is (re)materialized
+    return timezone.now() - timedelta(days=getattr(settings, 'EVENT_OCCURRENCE_LOOKBACK_DAYS', DEFAULT_LOOKBACK_DAYS))
+
+
+def materialize(event_id, start_time, end_time, pattern, until, after=None, batch_size=500):
+    """
+    Store the occurrences starting after ``after`` and before ``until``. Without
+    ``after`` they start at the one still running at occurrence_lookback(), not
+    at the first occurrence of the event.
+    """
+    window_start = after or max(start_time, occurrence_lookback())
+    rows = [
+        EventOccurrence(event_id=event_id, start_time=occurrence_start, end_time=occurrence_end)
+        for occurrence_start, occurrence_end in compile_rule(pattern, start_time, end_time).between(window_start, until)
+        if after is None or occurrence_start > after
+    ]
+    EventOccurrence.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def refresh_event_occurrences(event):
+    # called from Event.save(), cheap no-op unless the timing of the event changed
+    if not materialization_enabled():
+        return
+    if getattr(event, '_loaded_timing', None) == event.timing():
+        return
+
+    pattern = recurrence_of(event.is_recurring, event.recurrence_pattern)
+    if hasattr(event, '_loaded_timing'):
+        EventOccurrence.objects.filter(event_id=event.id).delete()
+    if pattern is not None:
+        materialize(event.id, event.start_time, event.end_time, pattern, occurrence_horizon())
+
+
+def refresh_occurrences_bulk(events):
+    # bulk_update() skips Event.save(): one delete for every event whose timing
+    # changed, then the recurring ones are materialized again
+    if not materialization_enabled():
+        return
+    changed = [event for event in events if getattr(event, '_loaded_timing', None) != event.timing()]
+    if changed:
+        EventOccurrence.objects.filter(event_id__in=[event.id for event in changed]).delete()
+        materialize_new_events(changed)
+
+
+def materialize_new_events(events):
+    # bulk_create() skips Event.save(), so bulk paths call this for the new rows
+    if not materialization_enabled():
+        return
+    until = occurrence_horizon()
+    for event in events:
+        pattern = recurrence_of(event.is_recurring, event.recurrence_pattern)
+        if pattern is not None:
+            materialize(event.id, event.start_time, event.end_time, pattern, until)
+
+
+def extend_occurrences(events, until, batch_size=500):
+    """
+    Materialize every recurring event of ``events`` (a queryset) up to ``until``,
+    continuing after its last stored occurrence. Returns the number of new rows.
+    """
+    created = 0
+    recurring = events.filter(is_recurring=True).annotate(last_occurrence=Max('occurrences__start_time'))
+    for event in recurring.values('id', 'start_time', 'end_time', 'is_recurring', 'recurrence_pattern', 'last_occurrence').iterator(chunk_size=batch_size):
+        pattern = recurrence_of(event['is_recurring'], event['recurrence_pattern'])
+        if pattern is None:
+            continue
+        created += materialize(
+            event['id'], event['start_time'], event['end_time'], pattern, until,
+            after=event['last_occurrence'], batch_size=batch_size,
+        )
+    return created
+
+
+def occurrence_streams(rows, window_start, window_end):
+    """
+    One sorted generator of (start, event_id, end, row) per event row, ready for heapq.merge.
+
+    ``rows`` are dicts with id, start_time, end_time, is_recurring and
+    recurrence_pattern. When materialization is on, recurring events are read
+    from EventOccurrence (two queries for the whole window) and only the parts
+    before an event's first and past its last stored occurrence are generated.
+    """
+    rows = list(rows)
+    patterns = {row['id']: recurrence_of(row['is_recurring'], row['recurrence_pattern']) for row in rows}
+
+    stored = {}
+    covered = {}
+    recurring_ids = [event_id for event_id, pattern in patterns.items() if pattern is not None]
+    if recurring_ids and materialization_enabled():
+        covered = {
+            event_id: (first, last)
+            for event_id, first, last in EventOccurrence.objects.filter(event_id__in=recurring_ids)
+            .values('event_id').annotate(first=Min('start_time'), last=Max('start_time')).values_list('event_id', 'first', 'last')
+        }
+        window_rows = EventOccurrence.objects.filter(
+            event_id__in=recurring_ids, start_time__lt=window_end, end_time__gt=window_start
+        ).order_by('event_id', 'start_time').values_list('event_id', 'start_time', 'end_time')
+        for event_id, start_time, end_time in window_rows:
+            stored.setdefault(event_id, []).append((start_time, end_time))
+
+    def stream(row):
+        pattern = patterns[row['id']]
+        if row['id'] not in covered:
+            generated = occurrences(row['start_time'], row['end_time'], pattern, window_start, window_end)
+        else:
+            first, last = covered[row['id']]
+            # occurrences older than the lookback the event was materialized with
+            if window_start < first:
+                for start_time, end_time in occurrences(row['start_time'], row['end_time'], pattern, window_start, min(window_end, first)):
+                    yield start_time, row['id'], end_time, row
+            for start_time, end_time in stored.get(row['id'], ()):
+                yield start_time, row['id'], end_time, row
+            if last >= window_end:
+                return
+            generated = (
+                occurrence for occurrence in occurrences(row['start_time'], row['end_time'], pattern, max(window_start, last), window_end)
+                if occurrence[0] > last
+            )
+        for start_time, end_time in generated:
+            yield start_time, row['id'], end_time, row
+
+    return [stream(row) for row in rows]
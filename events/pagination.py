@@ -0,0 +1,72 @@
+# events/pagination.py
+# Keyset (cursor) pagination on (start_time, id).
+# Django's Paginator needs a COUNT(*) and an OFFSET scan that grows with the page
+# number; a keyset page is a range read right after (or before) the cursor row,
+# so every page costs the same no matter how deep it is.
+import base64
+import json
+from operator import attrgetter
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(start_time, pk, direction):
+    payload = json.dumps({"s": start_time.isoformat(), "i": pk, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start_time = parse_datetime(payload["s"])
+        pk = int(payload["i"])
+        direction = payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if start_time is None or direction not in ("next", "prev"):
+        raise InvalidCursor("Invalid cursor")
+    return start_time, pk, direction
+
+
+def keyset_page(queryset, cursor, page_size, key=attrgetter("start_time", "id")):
+    """
+    One page of ``queryset`` ordered by (start_time, id).
+
+    ``cursor`` is None/empty for the first page, otherwise a value previously
+    returned as next/prev. Returns (items, next_cursor, prev_cursor), the
+    cursors being None when there is nothing in that direction. ``key`` reads
+    (start_time, id) from an item, pass another one for values()/values_list()
+    querysets.
+    """
+    if not cursor:
+        items = list(queryset.order_by("start_time", "id")[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        next_cursor = encode_cursor(*key(items[-1]), "next") if has_more else None
+        return items, next_cursor, None
+
+    start_time, pk, direction = decode_cursor(cursor)
+    if direction == "next":
+        after = Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk)
+        items = list(queryset.filter(after).order_by("start_time", "id")[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        has_next, has_prev = has_more, True
+    else:
+        before = Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk)
+        items = list(queryset.filter(before).order_by("-start_time", "-id")[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size][::-1]
+        has_next, has_prev = True, has_more
+
+    if not items:
+        return items, None, None
+    next_cursor = encode_cursor(*key(items[-1]), "next") if has_next else None
+    prev_cursor = encode_cursor(*key(items[0]), "prev") if has_prev else None
+    return items, next_cursor, prev_cursor
@@ -0,0 +1,69 @@
+# events/permissions.py
+# One place to answer "what is this user's role on this event".
+# Views declare which roles may call each method (event_roles) and
+# EventRolePermission checks it once per request. The role is one lookup on the
+# (user, event, role) index, never the cached participant list (which can lag
+# a removal); when that says "no role" or the view needs the Event itself, a
+# single query fetches the event together with the caller's role. Results are
+# memoized on the request, so the view reuses them.
+from collections import namedtuple
+
+from django.db.models import OuterRef, Subquery
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import BasePermission
+
+from .caching import get_participant_role
+from .models import Event, EventParticipant
+
+OWNER_ROLES = ('OWNER',)
+PARTICIPANT_ROLES = ('OWNER', 'EDITOR', 'VIEWER')
+
+EventAccess = namedtuple('EventAccess', ['event', 'role', 'exists'])
+
+
+def get_event_access(request, event_id, load_event=False):
+    """EventAccess(event, role, exists) of request.user on ``event_id``; ``event`` is only loaded when asked for."""
+    memo = request.__dict__.setdefault('_event_access', {})
+    access = memo.get(event_id)
+    if access is not None and (access.event is not None or not load_event or not access.exists):
+        return access
+
+    if not load_event:
+        role = get_participant_role(event_id, request.user.id)
+        if role is not None:
+            memo[event_id] = EventAccess(None, role, True)
+            return memo[event_id]
+
+    caller_role = EventParticipant.objects.filter(event_id=OuterRef('pk'), user_id=request.user.id).values('role')[:1]
+    event = Event.objects.filter(id=event_id).annotate(caller_role=Subquery(caller_role)).first()
+    memo[event_id] = EventAccess(event, event.caller_role if event else None, event is not None)
+    return memo[event_id]
+
+
+class EventRolePermission(BasePermission):
+    """
+    Role check for views whose URL has the event ``id``.
+
+    The view sets ``event_roles = {method: (allowed_roles, denied_message)}``;
+    methods that aren't listed are not checked here. Methods listed in
+    ``event_load_methods`` get the Event instance loaded in the same query, and
+    methods in ``event_hidden_methods`` answer a denial with a 404 so they don't
+    tell outsiders that the event exists.
+    """
+
+    def has_permission(self, request, view):
+        rule = getattr(view, 'event_roles', {}).get(request.method)
+        if rule is None:
+            return True
+        allowed_roles, denied_message = rule
+
+        load_event = request.method in getattr(view, 'event_load_methods', ())
+        access = get_event_access(request, view.kwargs['id'], load_event=load_event)
+        if not access.exists:
+            raise NotFound({"error": "Event not found"})
+        if access.role in allowed_roles:
+            return True
+        if request.method in getattr(view, 'event_hidden_methods', ()):
+            raise NotFound({"error": denied_message})
+        self.message = {"error": denied_message}
+        return False
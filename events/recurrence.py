@@ -0,0 +1,104 @@
+# events/recurrence.py
+# Expansion of recurring events (is_recurring + recurrence_pattern).
+# Occurrences are never stored, they are generated lazily for the window that is
+# asked for, so an event repeating forever costs nothing until somebody looks at it.
+import calendar
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+
+FIXED_STEPS = {
+    'DAILY': timedelta(days=1),
+    'WEEKLY': timedelta(weeks=1),
+}
+MONTH_STEPS = {
+    'MONTHLY': 1,
+    'YEARLY': 12,
+}
+
+
+def recurrence_of(is_recurring, recurrence_pattern):
+    """The normalised pattern of an event, or None when it doesn't repeat (or the pattern is unknown)."""
+    if not is_recurring or not recurrence_pattern:
+        return None
+    pattern = recurrence_pattern.upper()
+    if pattern in FIXED_STEPS or pattern in MONTH_STEPS:
+        return pattern
+    return None
+
+
+def conflict_horizon():
+    # how far ahead a new recurring event is checked for overlaps
+    return timedelta(days=getattr(settings, 'EVENT_RECURRENCE_CONFLICT_HORIZON_DAYS', 365))
+
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    # 31st of a short month falls back to its last day
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+class Rule:
+    """A compiled recurrence: the n-th occurrence can be computed directly, without walking from the first one."""
+
+    __slots__ = ('pattern', 'start_time', 'duration', 'step', 'months')
+
+    def __init__(self, pattern, start_time, end_time):
+        self.pattern = pattern
+        self.start_time = start_time
+        self.duration = end_time - start_time
+        self.step = FIXED_STEPS.get(pattern)
+        self.months = MONTH_STEPS.get(pattern)
+
+    def occurrence(self, n):
+        if self.step is not None:
+            return self.start_time + self.step * n
+        return _add_months(self.start_time, self.months * n)
+
+    def first_index(self, window_start):
+        """Index of the first occurrence still running at ``window_start``."""
+        if window_start <= self.start_time:
+            return 0
+        if self.step is not None:
+            return max(0, (window_start - self.duration - self.start_time) // self.step + 1)
+
+        months = (window_start.year - self.start_time.year) * 12 + window_start.month - self.start_time.month
+        n = max(0, (months - self.duration.days // 28) // self.months - 1)
+        while self.occurrence(n) + self.duration <= window_start:
+            n += 1
+        return n
+
+    def between(self, window_start, window_end):
+        """Yield (start, end) of every occurrence overlapping [window_start, window_end), in order."""
+        n = self.first_index(window_start)
+        while True:
+            start_time = self.occurrence(n)
+            if start_time >= window_end:
+                return
+            yield start_time, start_time + self.duration
+            n += 1
+
+    def overlaps(self, start_time, end_time):
+        return next(self.between(start_time, end_time), None) is not None
+
+
+@lru_cache(maxsize=4096)
+def compile_rule(pattern, start_time, end_time):
+    # keyed on the event's timing, so editing an event simply compiles a new rule
+    return Rule(pattern, start_time, end_time)
+
+
+def occurrences(start_time, end_time, pattern, window_start, window_end):
+    """
+    Lazily yield (start, end) of the occurrences of an event inside the window.
+    ``pattern`` is what recurrence_of() returned; None means a one-off event.
+    """
+    if pattern is None:
+        if start_time < window_end and end_time > window_start:
+            yield start_time, end_time
+        return
+    yield from compile_rule(pattern, start_time, end_time).between(window_start, window_end)
@@ -0,0 +1,32 @@
+# events/renderers.py
+# JSON renderer that uses orjson when it is installed (pip install orjson).
+# Event lists are plain dicts/lists/strings by the time they get here, which
+# orjson writes several times faster than json.dumps. Anything it can't handle
+# natively (Decimal, lazy strings, datetimes so they keep DRF's format) goes
+# through DRF's encoder, and pretty printing falls back to the stock renderer.
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional, the stock renderer is used without it
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # same strict javascript subset as the stock renderer
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
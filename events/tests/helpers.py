@@ -0,0 +1,21 @@
+from datetime import datetime, timezone as dt_timezone
+
+from rest_framework.test import APIClient
+
+from events.models import Event, EventParticipant
+
+
+def at(day, hour, minute=0):
+    return datetime(2030, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+def make_event(owner, title, start_time, end_time, **fields):
+    event = Event.objects.create(title=title, start_time=start_time, end_time=end_time, **fields)
+    EventParticipant.objects.create(user=owner, event=event, role='OWNER')
+    return event
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from events.history import restore_many, versions_as_of
+from events.models import HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+class AsOfTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+
+    def edit(self, event, title, when):
+        # history_date is set to now() on save, pin it so as_of can be picked between versions
+        event.title = title
+        event.save()
+        latest = HistoricalEvent.objects.filter(id=event.id).order_by('-history_id').first()
+        HistoricalEvent.objects.filter(history_id=latest.history_id).update(history_date=when)
+
+    def created(self, event, when):
+        HistoricalEvent.objects.filter(id=event.id).update(history_date=when)
+
+    def test_versions_as_of(self):
+        event = make_event(self.owner, 'before', at(1, 10), at(1, 11))
+        as_of = HistoricalEvent.objects.get(id=event.id).history_date
+        with override_settings(EVENT_HISTORY_DELTA=True):
+            for i in range(2):
+                event.title = f"title {i}"
+                event.save()
+        versions = list(versions_as_of([event.id], as_of))
+        self.assertEqual([version.title for version in restore_many(versions)], ['before'])
+
+    def test_latest_version_per_event(self):
+        first = make_event(self.owner, 'first', at(1, 10), at(1, 11))
+        second = make_event(self.owner, 'second', at(2, 10), at(2, 11))
+        self.created(first, at(1, 0))
+        self.created(second, at(1, 0))
+        self.edit(first, 'first v2', at(1, 1))
+        self.edit(first, 'first v3', at(1, 3))
+        self.edit(second, 'second v2', at(1, 2))
+
+        titles = sorted(version.title for version in versions_as_of([first.id, second.id], at(1, 2)))
+        self.assertEqual(titles, ['first v2', 'second v2'])
+        self.assertEqual(list(versions_as_of([first.id], at(1, 0) - timedelta(minutes=1))), [])
+
+    def test_deleted_events_are_left_out(self):
+        gone = make_event(self.owner, 'gone', at(1, 10), at(1, 11))
+        self.created(gone, at(1, 0))
+        gone_id = gone.id
+        gone.delete()
+        HistoricalEvent.objects.filter(id=gone_id, history_type='-').update(history_date=at(1, 2))
+
+        self.assertEqual([version.title for version in versions_as_of([gone_id], at(1, 1))], ['gone'])
+        # the deletion is the latest version, so an older one must not show up instead
+        self.assertEqual(list(versions_as_of([gone_id], at(1, 3))), [])
+
+    def test_filters_apply_to_the_picked_version(self):
+        event = make_event(self.owner, 'moved', at(1, 10), at(1, 11))
+        self.created(event, at(1, 0))
+        event.start_time, event.end_time = at(5, 10), at(5, 11)
+        self.edit(event, 'moved', at(1, 1))
+
+        # the latest version is outside the range, the older one inside must not replace it
+        versions = versions_as_of([event.id], at(1, 2)).filter(start_time__lt=at(2, 0))
+        self.assertEqual(list(versions), [])
+
+    def test_list_and_detail(self):
+        event = make_event(self.owner, 'standup', at(1, 10), at(1, 11))
+        other = make_event(self.owner, 'retro', at(2, 10), at(2, 11))
+        self.created(event, at(1, 0))
+        self.created(other, at(1, 0))
+        self.edit(event, 'daily standup', at(1, 2))
+
+        response = self.client.get('/api/events/', {'as_of': '2030-01-01T01:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.data['results']], ['standup', 'retro'])
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get('/api/events/', {'as_of': '2030-01-01T03:00:00Z', 'title': 'daily'})
+        self.assertEqual([row['title'] for row in response.data['results']], ['daily standup'])
+
+        response = self.client.get(f'/api/events/{event.id}/', {'as_of': '2030-01-01T01:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'standup')
+
+        response = self.client.get(f'/api/events/{event.id}/', {'as_of': '2029-12-31T00:00:00Z'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/events/', {'as_of': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,50 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .helpers import at, client_for, make_event
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.outsider = User.objects.create_user('outsider', password='pw')
+        self.event = make_event(self.owner, 'standup', at(1, 9), at(1, 10))
+        make_event(self.owner, 'review', at(2, 9), at(2, 10))
+        make_event(self.outsider, 'other', at(1, 9), at(1, 10))
+
+    def auth(self, user):
+        return {'headers': {'Authorization': f'Bearer {AccessToken.for_user(user)}'}}
+
+    async def test_list_matches_the_sync_view(self):
+        sync = await self.run_sync_get('/api/events/', {'page_size': 1, 'page': 2})
+        response = await self.async_client.get('/api/events/async/', {'page_size': 1, 'page': 2}, **self.auth(self.owner))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync)
+        self.assertEqual([row['title'] for row in response.json()['results']], ['review'])
+
+    async def test_detail_and_participants(self):
+        url = f'/api/events/async/{self.event.id}/'
+        response = await self.async_client.get(url, **self.auth(self.owner))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), await self.run_sync_get(f'/api/events/{self.event.id}/'))
+
+        response = await self.async_client.get(f'{url}permissions/', **self.auth(self.owner))
+        self.assertEqual([p['username'] for p in response.json()['participants']], ['owner'])
+
+        self.assertEqual((await self.async_client.get(url, **self.auth(self.outsider))).status_code, 404)
+        self.assertEqual((await self.async_client.get(f'{url}permissions/', **self.auth(self.outsider))).status_code, 403)
+        self.assertEqual((await self.async_client.get('/api/events/async/999999/permissions/', **self.auth(self.owner))).status_code, 404)
+
+    async def test_authentication_is_required(self):
+        self.assertEqual((await self.async_client.get('/api/events/async/')).status_code, 401)
+        response = await self.async_client.get('/api/events/async/', headers={'Authorization': 'Bearer garbage'})
+        self.assertEqual(response.status_code, 401)
+
+    async def run_sync_get(self, url, params=None):
+        def get():
+            return client_for(self.owner).get(url, params or {}).json()
+        return await sync_to_async(get)()
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from events import caching
+from events.models import EventParticipant
+
+from .helpers import at, client_for, make_event
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.viewer = User.objects.create_user('viewer', password='pw')
+        self.event = make_event(self.owner, 'event', at(1, 10), at(1, 11))
+        EventParticipant.objects.create(user=self.viewer, event=self.event, role='VIEWER')
+        self.url = f'/api/events/{self.event.id}/'
+
+    def test_version_is_bumped_on_commit(self):
+        version = caching.get_event_version(self.event.id)
+        self.assertEqual(caching.get_event_version(self.event.id), version)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.event.title = 'renamed'
+            self.event.save()
+            # not before the commit, a reader could cache the old row under the new version
+            self.assertEqual(caching.get_event_version(self.event.id), version)
+        self.assertTrue(callbacks)
+        self.assertGreater(caching.get_event_version(self.event.id), version)
+
+    def test_lost_version_restarts_from_the_clock(self):
+        caching.bump_event_version(self.event.id)
+        old = caching.get_event_version(self.event.id)
+        cache.delete(caching.event_version_key(self.event.id))
+        time.sleep(0.002)  # versions are milliseconds
+        self.assertGreater(caching.get_event_version(self.event.id), old)
+
+    def test_one_entry_serves_every_participant(self):
+        self.assertEqual(client_for(self.owner).get(self.url).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = client_for(self.viewer).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'event')
+        # only the role lookup, the payload and the participant list come from the cache
+        self.assertEqual(len(queries), 1)
+
+    def test_writes_are_seen_by_everybody(self):
+        client_for(self.viewer).get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.owner).put(self.url, {'title': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client_for(self.viewer).get(self.url).data['title'], 'renamed')
+
+    def test_participant_changes_bump_the_list(self):
+        self.assertEqual(len(caching.get_event_participants(self.event.id)), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            EventParticipant.objects.get(user=self.viewer, event=self.event).delete()
+        self.assertEqual([p['username'] for p in caching.get_event_participants(self.event.id)], ['owner'])
+        # and the removed participant loses access right away
+        self.assertEqual(client_for(self.viewer).get(self.url).status_code, 404)
+
+
+class StampedeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_one_recompute_per_key(self):
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(caching.get_or_compute('stampede_key', compute))) for _ in range(5)]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_early_refresh_keeps_serving_while_locked(self):
+        caching.get_or_compute('stampede_key', lambda: 'old', timeout=60)
+        value, cost, _ = cache.get('stampede_key')
+        # entry about to expire: a refresh is due, but somebody else holds the lock
+        cache.set('stampede_key', (value, cost, time.time()), timeout=60)
+        cache.add('stampede_key_lock', 1)
+        self.assertEqual(caching.get_or_compute('stampede_key', lambda: 'new'), 'old')
+        cache.delete('stampede_key_lock')
+        self.assertEqual(caching.get_or_compute('stampede_key', lambda: 'new'), 'new')
+
+    def test_dead_lock_holder_is_not_waited_on_forever(self):
+        cache.add('stampede_key_lock', 1)
+        with mock.patch.object(caching, 'RECOMPUTE_WAIT', 0.05):
+            self.assertEqual(caching.get_or_compute('stampede_key', lambda: 'value'), 'value')
+
+    def test_async_single_flight(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'value'
+
+        async def run():
+            return await asyncio.gather(*(caching.aget_or_compute('stampede_key', compute) for _ in range(5)))
+
+        self.assertEqual(async_to_sync(run)(), ['value'] * 5)
+        self.assertEqual(len(calls), 1)
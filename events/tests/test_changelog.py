@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from events.models import HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+class ChangelogTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        self.event = make_event(self.owner, 'title 0', at(1, 10), at(1, 11))
+        for i in range(1, 5):
+            self.event.title = f"title {i}"
+            self.event.save()
+        self.url = f'/api/events/{self.event.id}/changelog/'
+
+    def titles_changed(self, entries):
+        return [entry['changed_fields'].get('title', {}).get('to') for entry in entries]
+
+    def test_full_changelog(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['history_type'] for entry in response.data], ['+', '~', '~', '~', '~'])
+        self.assertEqual(self.titles_changed(response.data), [None, 'title 1', 'title 2', 'title 3', 'title 4'])
+        self.assertEqual(response.data[1]['changed_fields'], {'title': {'from': 'title 0', 'to': 'title 1'}})
+
+    def test_cursor_pages(self):
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor, 'page_size': 2})
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.titles_changed(response.data['results']))
+            cursor = response.data['next']
+        self.assertEqual(pages, [[None, 'title 1'], ['title 2', 'title 3'], ['title 4']])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'x'}).status_code, 400)
+
+    def test_rows_without_stored_changes(self):
+        # history written before the changed fields were stored
+        HistoricalEvent.objects.filter(id=self.event.id).update(history_delta=None)
+        expected = self.client.get(self.url).data
+        self.assertEqual(self.titles_changed(expected), [None, 'title 1', 'title 2', 'title 3', 'title 4'])
+        second_page = self.client.get(self.url, {'cursor': str(expected[1]['history_id']), 'page_size': 2}).data['results']
+        self.assertEqual(self.titles_changed(second_page), ['title 2', 'title 3'])
+
+        call_command('backfill_changelog', stdout=StringIO())
+        self.assertFalse(HistoricalEvent.objects.filter(id=self.event.id, history_delta__isnull=True).exists())
+        self.assertEqual(self.client.get(self.url).data, expected)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from events.conflicts import IntervalIndex, find_batch_conflicts, find_conflicts
+from events.models import Event, EventParticipant, HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+class BatchConflictTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.meeting = make_event(self.owner, 'meeting', at(1, 10), at(1, 11))
+        self.standup = make_event(self.owner, 'standup', at(1, 9), at(1, 9, 15), is_recurring=True, recurrence_pattern='DAILY')
+
+    def test_sweep(self):
+        conflicts = find_batch_conflicts(self.owner.id, [
+            ('overlaps existing', at(1, 10, 30), at(1, 11, 30), None),
+            ('free', at(1, 12), at(1, 13), None),
+            ('overlaps batch', at(1, 12, 30), at(1, 13, 30), None),
+            ('touches', at(1, 13), at(1, 14), None),
+            ('overlaps recurring', at(5, 9), at(5, 10), None),
+        ])
+        self.assertEqual(set(conflicts), {'overlaps existing', 'overlaps batch', 'overlaps recurring'})
+        self.assertEqual([event['id'] for event in conflicts['overlaps existing']['conflicts']], [self.meeting.id])
+        self.assertEqual([event['id'] for event in conflicts['overlaps recurring']['conflicts']], [self.standup.id])
+
+    def test_other_users_events_dont_conflict(self):
+        other = User.objects.create_user('other', password='pw')
+        self.assertEqual(find_batch_conflicts(other.id, [('a', at(1, 10), at(1, 11), None)]), {})
+
+    def test_bulk_endpoint(self):
+        response = client_for(self.owner).post('/api/events/batch/', [
+            {'title': 'free', 'start_time': '2030-01-01T12:00:00Z', 'end_time': '2030-01-01T13:00:00Z'},
+            {'title': 'busy', 'start_time': '2030-01-01T10:00:00Z', 'end_time': '2030-01-01T10:30:00Z'},
+        ], format='json')
+        self.assertEqual([event['title'] for event in response.data['created_events']], ['free'])
+        self.assertEqual(len(response.data['errors']), 1)
+
+    def test_bulk_created_events_have_history(self):
+        client = client_for(self.owner)
+        response = client.post('/api/events/batch/', [
+            {'title': 'free', 'start_time': '2030-01-01T12:00:00Z', 'end_time': '2030-01-01T13:00:00Z'},
+        ], format='json')
+        event_id = response.data['created_events'][0]['id']
+        [created] = HistoricalEvent.objects.filter(id=event_id)
+        self.assertEqual((created.history_type, created.history_user), ('+', self.owner))
+
+        client.put(f'/api/events/{event_id}/', {'title': 'renamed'}, format='json')
+        response = client.post('/api/events/rollback/', {'as_of': created.history_date.isoformat(), 'event_ids': [event_id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Event.objects.get(id=event_id).title, 'free')
+
+
+class EventConflictTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        self.meeting = make_event(self.owner, 'meeting', at(1, 10), at(1, 11))
+
+    def test_interval_index(self):
+        index = IntervalIndex([
+            (at(1, 8), at(1, 18), 1, None),  # long event, ends after later-starting short ones
+            (at(1, 9), at(1, 9, 30), 2, None),
+            (at(1, 12), at(1, 13), 3, None),
+            (at(1, 7), at(1, 7, 30), 4, 'DAILY'),
+        ])
+        self.assertEqual(sorted(index.overlapping(at(1, 12, 30), at(1, 14))), [1, 3])
+        self.assertEqual(index.overlapping(at(1, 13), at(1, 14), exclude=1), [])
+        self.assertEqual(index.overlapping(at(5, 7, 15), at(5, 7, 20)), [4])
+        # half open: touching intervals don't overlap
+        self.assertEqual(index.overlapping(at(1, 18), at(1, 19)), [])
+
+    def test_find_conflicts(self):
+        self.assertEqual([c['id'] for c in find_conflicts([self.owner.id], at(1, 10, 30), at(1, 12))], [self.meeting.id])
+        self.assertEqual(find_conflicts([self.owner.id], at(1, 11), at(1, 12)), [])
+        self.assertEqual(find_conflicts([self.owner.id], at(1, 10), at(1, 11), exclude_event_id=self.meeting.id), [])
+
+    def test_recurring_conflicts(self):
+        standup = make_event(self.owner, 'standup', at(1, 9), at(1, 9, 15), is_recurring=True, recurrence_pattern='DAILY')
+        self.assertEqual([c['id'] for c in find_conflicts([self.owner.id], at(20, 9, 10), at(20, 10))], [standup.id])
+        # a new weekly event hitting the one-off meeting a week in
+        conflicts = find_conflicts([self.owner.id], at(1, 10, 30) - timedelta(weeks=1), at(1, 10, 45) - timedelta(weeks=1), recurrence_pattern='WEEKLY')
+        self.assertEqual([c['id'] for c in conflicts], [self.meeting.id])
+
+    def test_create_and_update(self):
+        response = self.client.post('/api/events/', {
+            'title': 'clash', 'start_time': '2030-01-01T10:30:00Z', 'end_time': '2030-01-01T11:30:00Z',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([c['id'] for c in response.data['conflicts']], [self.meeting.id])
+
+        # moving an event over its own old slot isn't a conflict
+        response = self.client.put(f'/api/events/{self.meeting.id}/', {
+            'start_time': '2030-01-01T10:30:00Z', 'end_time': '2030-01-01T11:30:00Z',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # but another participant's event is
+        other = User.objects.create_user('other', password='pw')
+        busy = make_event(other, 'busy', at(1, 12), at(1, 13))
+        EventParticipant.objects.create(user=other, event=self.meeting, role='VIEWER')
+        response = self.client.put(f'/api/events/{self.meeting.id}/', {'end_time': '2030-01-01T12:30:00Z'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['conflicts'][0]['id'], busy.id)
+        self.assertEqual(response.data['conflicts'][0]['user_ids'], [other.id])
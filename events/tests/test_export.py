@@ -0,0 +1,59 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from events.export import _ics_line, _ics_text
+
+from .helpers import at, client_for, make_event
+
+
+def body(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        make_event(self.owner, 'review', at(3, 14), at(3, 15), description='line one\nline two', location='Room 1, floor 2')
+        make_event(self.owner, 'standup', at(1, 9), at(1, 9, 15), is_recurring=True, recurrence_pattern='DAILY')
+        make_event(User.objects.create_user('other', password='pw'), 'not mine', at(1, 9), at(1, 10))
+
+    def test_ndjson_window(self):
+        response = self.client.get('/api/events/export/', {'from': '2030-01-02T00:00:00Z', 'to': '2030-01-04T00:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual([(row['title'], row['start_time'][:10]) for row in rows], [
+            ('standup', '2030-01-02'), ('standup', '2030-01-03'), ('review', '2030-01-03'),
+        ])
+
+    def test_ics(self):
+        response = self.client.get('/api/events/export/', {'output': 'ics', 'to': '2030-01-03T00:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="events.ics"', response['Content-Disposition'])
+        text = body(response)
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(text.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(text.count('BEGIN:VEVENT'), 2)
+        self.assertIn('DTSTART:20300101T090000Z\r\n', text)
+        self.assertNotIn('not mine', text)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/events/export/', {'output': 'csv'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/events/export/', {'from': 'soon'}).status_code, 400)
+
+
+class IcsFormattingTests(SimpleTestCase):
+    def test_text_escaping(self):
+        self.assertEqual(_ics_text('a,b;c\\d\ne'), 'a\\,b\\;c\\\\d\\ne')
+
+    def test_long_lines_are_folded_on_character_boundaries(self):
+        line = 'SUMMARY:' + 'é' * 60
+        folded = _ics_line(line)
+        parts = folded[:-2].split('\r\n ')
+        self.assertGreater(len(parts), 1)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in parts))
+        self.assertEqual(''.join(parts), line)
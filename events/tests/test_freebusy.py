@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from events.freebusy import coalesce, free_slots, freebusy
+from events.models import EventParticipant
+
+from .helpers import at, client_for, make_event
+
+
+class CoalesceTests(SimpleTestCase):
+    def test_overlapping_and_touching_blocks_merge(self):
+        self.assertEqual(coalesce([(at(1, 12), at(1, 13)), (at(1, 9), at(1, 10)), (at(1, 9, 30), at(1, 11)), (at(1, 11), at(1, 11, 30))]), [
+            (at(1, 9), at(1, 11, 30)), (at(1, 12), at(1, 13)),
+        ])
+
+    def test_free_slots(self):
+        busy = [(at(1, 9), at(1, 10)), (at(1, 10, 45), at(1, 12))]
+        self.assertEqual(free_slots(busy, at(1, 8), at(1, 13), timedelta(minutes=30), 4), [
+            (at(1, 8), at(1, 8, 30)), (at(1, 8, 30), at(1, 9)), (at(1, 10), at(1, 10, 30)), (at(1, 12), at(1, 12, 30)),
+        ])
+
+
+class FreeBusyTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        self.stranger = User.objects.create_user('stranger', password='pw')
+        shared = make_event(self.alice, 'shared', at(1, 9), at(1, 10))
+        EventParticipant.objects.create(user=self.bob, event=shared, role='VIEWER')
+        make_event(self.bob, 'gym', at(1, 11), at(1, 12), is_recurring=True, recurrence_pattern='DAILY')
+        make_event(self.stranger, 'secret', at(1, 13), at(1, 14))
+        self.window = {'from': '2030-01-01T08:00:00Z', 'to': '2030-01-01T14:00:00Z'}
+
+    def test_group_busy_and_free(self):
+        result = freebusy([self.alice.id, self.bob.id], at(1, 8), at(1, 14), timedelta(hours=1), 3)
+        self.assertEqual(result['users'][self.alice.id], [(at(1, 9), at(1, 10))])
+        self.assertEqual(result['busy'], [(at(1, 9), at(1, 10)), (at(1, 11), at(1, 12))])
+        self.assertEqual(result['free_slots'], [(at(1, 8), at(1, 9)), (at(1, 10), at(1, 11)), (at(1, 12), at(1, 13))])
+
+    def test_recurring_events_are_clipped_to_the_window(self):
+        result = freebusy([self.bob.id], at(5, 11, 30), at(5, 20))
+        self.assertEqual(result['busy'], [(at(5, 11, 30), at(5, 12))])
+
+    def test_endpoint(self):
+        client = client_for(self.alice)
+        response = client.get('/api/events/freebusy/', {**self.window, 'users': f'{self.alice.id},{self.bob.id}', 'duration': 60, 'slots': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['busy']), 2)
+        self.assertEqual(len(response.data['free_slots']), 1)
+
+    def test_freebusy_of_strangers(self):
+        client = client_for(self.bob)
+        self.assertEqual(client.get('/api/events/freebusy/', {**self.window, 'users': f'{self.alice.id}'}).status_code, 200)
+        response = client.get('/api/events/freebusy/', {**self.window, 'users': f'{self.alice.id},{self.stranger.id}'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['users'], [self.stranger.id])
+
+    def test_invalid_parameters(self):
+        client = client_for(self.alice)
+        self.assertEqual(client.get('/api/events/freebusy/', {**self.window, 'users': 'x'}).status_code, 400)
+        self.assertEqual(client.get('/api/events/freebusy/', {'users': f'{self.alice.id}'}).status_code, 400)
+        too_long = {'from': '2030-01-01T00:00:00Z', 'to': '2031-06-01T00:00:00Z', 'users': f'{self.alice.id}'}
+        self.assertEqual(client.get('/api/events/freebusy/', too_long).status_code, 400)
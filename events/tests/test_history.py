@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from events.history import IncompleteHistory, compact_history, record_state, restore, restore_many, version_state
+from events.models import Event, EventParticipant, HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+def edit(event, count):
+    for i in range(count):
+        event.title = f"title {i}"
+        event.description = f"description {i}"
+        event.end_time = event.end_time + timedelta(minutes=5)
+        event.save()
+
+
+def history_of(event):
+    return list(HistoricalEvent.objects.filter(id=event.id).order_by('history_date', 'history_id'))
+
+
+class HistoryDeltaTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+
+    def test_compaction_round_trip(self):
+        event = make_event(self.owner, 'title', at(1, 10), at(1, 11), description='description', location='room')
+        edit(event, 7)
+        full_copies = {record.history_id: record_state(record) for record in history_of(event)}
+
+        with override_settings(EVENT_HISTORY_SNAPSHOT_EVERY=3):
+            self.assertGreater(compact_history([event.id]), 0)
+
+        compacted = history_of(event)
+        deltas = [record for record in compacted if not record.history_is_snapshot]
+        self.assertTrue(deltas)
+        self.assertTrue(all(record.title == '' and record.description == '' for record in deltas))
+        for record in compacted:
+            self.assertEqual(version_state(record), full_copies[record.history_id])
+
+        restored = restore_many(list(HistoricalEvent.objects.filter(id=event.id)))
+        self.assertEqual({record.history_id: record_state(record) for record in restored}, full_copies)
+
+    def test_delta_rows_written_on_save(self):
+        event = make_event(self.owner, 'title', at(1, 10), at(1, 11), description='description', location='room')
+        with override_settings(EVENT_HISTORY_DELTA=True, EVENT_HISTORY_SNAPSHOT_EVERY=4):
+            edit(event, 5)
+        records = history_of(event)
+        self.assertEqual([record.history_is_snapshot for record in records], [True, False, False, False, True, False])
+
+        latest = restore(records[-1])
+        self.assertEqual((latest.title, latest.description, latest.location), ('title 4', 'description 4', 'room'))
+        self.assertEqual(latest.end_time, at(1, 11, 25))
+
+
+class MissingSnapshotTests(TestCase):
+    # events written without a history row (bulk inserts), and histories that start with a delta
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+
+    def test_first_update_without_history_is_a_snapshot(self):
+        [event] = Event.objects.bulk_create([Event(title='title', description='description', location='room', start_time=at(1, 10), end_time=at(1, 11))])
+        EventParticipant.objects.create(user=self.owner, event=event, role='OWNER')
+        self.assertEqual(history_of(event), [])
+
+        with override_settings(EVENT_HISTORY_DELTA=True):
+            edit(Event.objects.get(id=event.id), 2)
+        first, second = history_of(event)
+        self.assertTrue(first.history_is_snapshot)
+        self.assertEqual((first.title, first.location), ('title 0', 'room'))
+        self.assertEqual(restore(second).description, 'description 1')
+
+        response = client_for(self.owner).post(f'/api/events/{event.id}/rollback/{first.history_id}/')
+        self.assertEqual(response.status_code, 200)
+        event.refresh_from_db()
+        self.assertEqual((event.title, event.description, event.location), ('title 0', 'description 0', 'room'))
+
+    def test_leading_delta_row_is_not_a_state(self):
+        event = make_event(self.owner, 'title', at(1, 10), at(1, 11), description='description', location='room')
+        with override_settings(EVENT_HISTORY_DELTA=True):
+            edit(event, 2)
+        # what such a history looked like before: the snapshot it needs isn't there
+        HistoricalEvent.objects.filter(id=event.id, history_is_snapshot=True).delete()
+        records = history_of(event)
+        self.assertFalse(records[0].history_is_snapshot)
+
+        with self.assertRaises(IncompleteHistory):
+            version_state(records[0])
+        with self.assertRaises(IncompleteHistory):
+            restore_many(records)
+        self.assertEqual(restore_many(records, skip_incomplete=True), [])
+        self.assertEqual(compact_history([event.id]), 0)
+
+        response = client_for(self.owner).post(f'/api/events/{event.id}/rollback/{records[0].history_id}/')
+        self.assertEqual(response.status_code, 409)
+        event.refresh_from_db()
+        self.assertEqual((event.title, event.location), ('title 1', 'room'))
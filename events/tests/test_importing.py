@@ -0,0 +1,88 @@
+import json
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+
+from events.importing import import_events
+from events.models import Event, EventParticipant, HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+def ndjson(*items):
+    return "\n".join(item if isinstance(item, str) else json.dumps(item) for item in items).encode()
+
+
+def item(title, day, **fields):
+    return {'title': title, 'start_time': f'2030-01-{day:02d}T10:00:00Z', 'end_time': f'2030-01-{day:02d}T11:00:00Z', **fields}
+
+
+def messages(lines):
+    return [json.loads(line) for line in lines]
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+
+    def post(self, body):
+        response = client_for(self.owner).post('/api/events/import/', body, content_type='application/x-ndjson')
+        return messages(b''.join(response.streaming_content).decode().splitlines())
+
+    def test_lines_are_imported_and_errors_reported_per_line(self):
+        make_event(self.owner, 'existing', at(5, 10), at(5, 11))
+        result = self.post(ndjson(
+            item('a', 1),
+            '{not json',
+            item('b', 2, recurrence_pattern='HOURLY'),
+            item('x' * 300, 3),
+            item('conflict', 5),
+            item('c', 4, location=None),
+        ))
+        errors = {message['line']: message['error'] for message in result if 'line' in message}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5])
+        self.assertTrue(errors[2].startswith('Invalid JSON'))
+        self.assertIn('recurrence_pattern', errors[3])
+        self.assertIn('title', errors[4])
+        self.assertEqual(result[-1], {'done': {'lines': 6, 'created': 2, 'failed': 4, 'chunks': 1}})
+        self.assertEqual(Event.objects.get(title='c').description, '')
+        self.assertEqual(EventParticipant.objects.filter(user=self.owner, role='OWNER').count(), 3)
+
+    def test_recurrence_pattern_case(self):
+        # accepted like EventView.post does, stored as the choice
+        self.post(ndjson(item('standup', 1, is_recurring=True, recurrence_pattern='daily')))
+        self.assertEqual(Event.objects.get(title='standup').recurrence_pattern, 'DAILY')
+
+    @override_settings(EVENT_IMPORT_CHUNK_SIZE=2)
+    def test_chunks(self):
+        result = self.post(ndjson(*(item(f'e{day}', day) for day in range(1, 6))))
+        self.assertEqual([message['progress']['chunks'] for message in result if 'progress' in message], [1, 2, 3])
+        self.assertEqual(Event.objects.count(), 5)
+
+    def test_imported_events_have_history(self):
+        self.post(ndjson(item('a', 1, description='d')))
+        event = Event.objects.get(title='a')
+        [created] = HistoricalEvent.objects.filter(id=event.id)
+        self.assertEqual((created.history_type, created.history_user, created.history_delta), ('+', self.owner, {}))
+
+        client = client_for(self.owner)
+        self.assertEqual(client.get('/api/events/', {'as_of': created.history_date.isoformat()}).data['count'], 1)
+        self.assertEqual(len(client.get(f'/api/events/{event.id}/changelog/').data), 1)
+
+    def test_refused_chunk_is_retried_row_by_row(self):
+        bulk_create = QuerySet.bulk_create
+
+        def refuse_boom(queryset, objs, *args, **kwargs):
+            if any(getattr(obj, 'title', '') == 'boom' for obj in objs):
+                raise IntegrityError('boom')
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', refuse_boom):
+            result = messages(import_events(self.owner, BytesIO(ndjson(item('a', 1), item('boom', 2), item('c', 3)))))
+        self.assertEqual(result[0], {'line': 2, 'error': 'Not imported: boom'})
+        self.assertEqual(sorted(Event.objects.values_list('title', flat=True)), ['a', 'c'])
+        self.assertEqual(HistoricalEvent.objects.count(), 2)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from events.models import EventOccurrence
+
+from .helpers import client_for, make_event
+
+
+@override_settings(EVENT_MATERIALIZE_OCCURRENCES=True, EVENT_OCCURRENCE_LOOKBACK_DAYS=30, EVENT_OCCURRENCE_HORIZON_DAYS=60)
+class MaterializedOccurrenceTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def daily(self, start_time, title='daily'):
+        return make_event(self.owner, title, start_time, start_time + timedelta(hours=1), is_recurring=True, recurrence_pattern='DAILY')
+
+    def stored(self, event):
+        return list(EventOccurrence.objects.filter(event=event).order_by('start_time').values_list('start_time', flat=True))
+
+    def listed(self, window_start, window_end, page_size=100):
+        response = self.client.get('/api/events/', {
+            'from': window_start.isoformat(), 'to': window_end.isoformat(), 'page_size': page_size,
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_old_event_is_stored_from_the_lookback(self):
+        event = self.daily(self.now - timedelta(days=700))
+        stored = self.stored(event)
+        self.assertGreaterEqual(stored[0], self.now - timedelta(days=31))
+        self.assertLessEqual(stored[-1], self.now + timedelta(days=60))
+        self.assertIn(len(stored), (90, 91))
+
+    def test_new_event_is_stored_from_its_start(self):
+        start_time = self.now + timedelta(days=3)
+        self.assertEqual(self.stored(self.daily(start_time))[0], start_time)
+
+    def test_windows_before_the_stored_part_are_generated(self):
+        start_time = self.now - timedelta(days=700)
+        self.daily(start_time)
+        rows = self.listed(start_time, start_time + timedelta(days=5))
+        self.assertEqual(len(rows), 5)
+
+        # a window across the first stored occurrence mixes both, in order and without duplicates
+        window_start = self.now - timedelta(days=40)
+        rows = self.listed(window_start, window_start + timedelta(days=20))
+        self.assertEqual(len(rows), 20)
+        starts = [row['start_time'] for row in rows]
+        self.assertEqual(starts, sorted(set(starts)))
+
+    def test_timing_change_rematerializes_from_the_lookback(self):
+        event = self.daily(self.now + timedelta(days=3))
+        event.start_time -= timedelta(days=400)
+        event.end_time -= timedelta(days=400)
+        event.save()
+        self.assertGreaterEqual(self.stored(event)[0], self.now - timedelta(days=31))
+
+    def test_extend_continues_after_the_last_occurrence(self):
+        event = self.daily(self.now - timedelta(days=700))
+        before = self.stored(event)
+        call_command('extend_occurrences', days=90, stdout=StringIO())
+        after = self.stored(event)
+        self.assertEqual(after[:len(before)], before)
+        self.assertEqual(len(after), len(before) + 30)
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from events.models import Event
+from events.pagination import InvalidCursor, keyset_page
+
+from .helpers import at, client_for, make_event
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        # pairs share a start_time, so the id has to break the tie
+        for i in range(11):
+            make_event(self.owner, f"event {i}", at(1, 8 + i // 2), at(1, 20))
+        self.ordered = list(Event.objects.order_by('start_time', 'id').values_list('id', flat=True))
+
+    def test_next_and_prev(self):
+        items, next_cursor, prev_cursor = keyset_page(Event.objects.all(), None, 4)
+        self.assertIsNone(prev_cursor)
+        pages = [[event.id for event in items]]
+        while next_cursor:
+            items, next_cursor, prev_cursor = keyset_page(Event.objects.all(), next_cursor, 4)
+            pages.append([event.id for event in items])
+        self.assertEqual(pages, [self.ordered[0:4], self.ordered[4:8], self.ordered[8:11]])
+
+        # and back again from the last page
+        items, next_cursor, prev_cursor = keyset_page(Event.objects.all(), prev_cursor, 4)
+        self.assertEqual([event.id for event in items], self.ordered[4:8])
+        self.assertIsNotNone(next_cursor)
+        items, next_cursor, prev_cursor = keyset_page(Event.objects.all(), prev_cursor, 4)
+        self.assertEqual([event.id for event in items], self.ordered[0:4])
+        self.assertIsNone(prev_cursor)
+        items, next_cursor, prev_cursor = keyset_page(Event.objects.all(), next_cursor, 4)
+        self.assertEqual([event.id for event in items], self.ordered[4:8])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Event.objects.all(), 'not-a-cursor', 4)
+
+    def test_list_view_cursor(self):
+        client = client_for(self.owner)
+        response = client.get('/api/events/', {'cursor': '', 'page_size': 6})
+        self.assertEqual([row['id'] for row in response.data['results']], self.ordered[:6])
+        response = client.get('/api/events/', {'cursor': response.data['next'], 'page_size': 6})
+        self.assertEqual([row['id'] for row in response.data['results']], self.ordered[6:])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(client.get('/api/events/', {'cursor': 'garbage'}).status_code, 400)
+
+    def test_page_is_stable_under_inserts(self):
+        # a row added before the cursor doesn't shift the next page, unlike OFFSET
+        items, next_cursor, _ = keyset_page(Event.objects.all(), None, 4)
+        make_event(self.owner, 'early', at(1, 7), at(1, 20))
+        items, _, _ = keyset_page(Event.objects.all(), next_cursor, 4)
+        self.assertEqual([event.id for event in items], self.ordered[4:8])
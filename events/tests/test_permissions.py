@@ -0,0 +1,115 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from events.models import Event, EventParticipant
+from events.permissions import get_event_access
+
+from .helpers import at, client_for, make_event
+
+
+class PermissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.editor = User.objects.create_user('editor', password='pw')
+        self.viewer = User.objects.create_user('viewer', password='pw')
+        self.outsider = User.objects.create_user('outsider', password='pw')
+        self.event = make_event(self.owner, 'event', at(1, 10), at(1, 11))
+        EventParticipant.objects.create(user=self.editor, event=self.event, role='EDITOR')
+        EventParticipant.objects.create(user=self.viewer, event=self.event, role='VIEWER')
+
+    def request_for(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_access_is_one_query_and_memoized(self):
+        request = self.request_for(self.editor)
+        with CaptureQueriesContext(connection) as queries:
+            access = get_event_access(request, self.event.id)
+            self.assertEqual((access.role, access.exists, access.event), ('EDITOR', True, None))
+            get_event_access(request, self.event.id)
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            access = get_event_access(request, self.event.id, load_event=True)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual((access.event.title, access.role), ('event', 'EDITOR'))
+
+    def test_access_of_outsiders_and_missing_events(self):
+        access = get_event_access(self.request_for(self.outsider), self.event.id)
+        self.assertEqual((access.role, access.exists), (None, True))
+        access = get_event_access(self.request_for(self.owner), 999999)
+        self.assertEqual((access.event, access.exists), (None, False))
+
+    def test_detail(self):
+        url = f'/api/events/{self.event.id}/'
+        self.assertEqual(client_for(self.viewer).get(url).status_code, 200)
+        # outsiders aren't told the event exists
+        self.assertEqual(client_for(self.outsider).get(url).status_code, 404)
+        self.assertEqual(client_for(self.viewer).put(url, {'title': 'x'}, format='json').status_code, 403)
+        self.assertEqual(client_for(self.editor).delete(url).status_code, 403)
+        self.assertEqual(client_for(self.owner).get('/api/events/999999/').status_code, 404)
+        self.assertTrue(Event.objects.filter(id=self.event.id, title='event').exists())
+
+    def test_sharing_and_permissions(self):
+        share = {'users': [{'user_id': self.outsider.id, 'role': 'VIEWER'}]}
+        self.assertEqual(client_for(self.editor).post(f'/api/events/{self.event.id}/share/', share, format='json').status_code, 403)
+        self.assertEqual(client_for(self.outsider).get(f'/api/events/{self.event.id}/permissions/').status_code, 403)
+        update = {'updates': [{'user_id': self.viewer.id, 'role': 'OWNER'}]}
+        self.assertEqual(client_for(self.viewer).patch(f'/api/events/{self.event.id}/permissions/', update, format='json').status_code, 403)
+        self.assertEqual(EventParticipant.objects.get(event=self.event, user=self.viewer).role, 'VIEWER')
+
+    def test_removed_participant_loses_access(self):
+        url = f'/api/events/{self.event.id}/'
+        self.assertEqual(client_for(self.viewer).get(url).status_code, 200)
+        client_for(self.owner).delete(f'/api/events/{self.event.id}/permissions/{self.viewer.id}/')
+        self.assertEqual(client_for(self.viewer).get(url).status_code, 404)
+
+
+class BatchPermissionUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.event = make_event(self.owner, 'event', at(1, 10), at(1, 11))
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(4)]
+        for user in self.users:
+            EventParticipant.objects.create(user=user, event=self.event, role='VIEWER')
+        self.url = f'/api/events/{self.event.id}/permissions/'
+        self.client = client_for(self.owner)
+
+    def roles(self):
+        return dict(EventParticipant.objects.filter(event=self.event).values_list('user__username', 'role'))
+
+    def patch(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(self.url, data, format='json')
+
+    def test_updates_and_removals_in_one_request(self):
+        response = self.patch({
+            'updates': [{'user_id': self.users[0].id, 'role': 'EDITOR'}, {'user_id': self.users[1].id, 'role': 'OWNER'}, {'user_id': 999999, 'role': 'VIEWER'}],
+            'remove': [self.users[2].id],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['removed'], [self.users[2].id])
+        self.assertEqual(response.data['errors'], [{'user_id': 999999, 'error': 'Participant not found for this event.'}])
+        self.assertEqual(self.roles(), {'owner': 'OWNER', 'user0': 'EDITOR', 'user1': 'OWNER', 'user3': 'VIEWER'})
+        # the cached participant list was invalidated once for the batch
+        listed = self.client.get(self.url).data['participants']
+        self.assertEqual({p['username']: p['role'] for p in listed}, self.roles())
+
+    def test_owner_cannot_demote_themselves(self):
+        response = self.patch({'updates': [{'user_id': self.owner.id, 'role': 'VIEWER'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.patch({'remove': [self.owner.id]}).status_code, 400)
+        self.assertEqual(self.roles()['owner'], 'OWNER')
+
+    def test_invalid_batches_write_nothing(self):
+        before = self.roles()
+        self.assertEqual(self.patch({'updates': [{'user_id': self.users[0].id, 'role': 'ADMIN'}]}).status_code, 400)
+        self.assertEqual(self.patch({'updates': [{'user_id': self.users[0].id, 'role': 'EDITOR'}], 'remove': [self.users[0].id]}).status_code, 400)
+        self.assertEqual(self.patch({'updates': 'nope'}).status_code, 400)
+        self.assertEqual(self.roles(), before)
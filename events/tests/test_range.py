@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from events.models import Event
+
+from .helpers import at, client_for, make_event
+
+
+class RangeFilterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        make_event(self.owner, 'before', at(1, 8), at(1, 9))
+        make_event(self.owner, 'touching', at(1, 9), at(1, 10))
+        make_event(self.owner, 'inside', at(1, 11), at(1, 12))
+        make_event(self.owner, 'spanning', at(1, 7), at(2, 7))
+        make_event(self.owner, 'after', at(1, 13), at(1, 14))
+        make_event(User.objects.create_user('other', password='pw'), 'not mine', at(1, 11), at(1, 12))
+
+    def titles(self, **params):
+        response = self.client.get('/api/events/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.data['results']]
+
+    def test_overlapping_events(self):
+        window = {'start': '2030-01-01T10:00:00Z', 'end': '2030-01-01T13:00:00Z'}
+        self.assertEqual(self.titles(**window), ['spanning', 'inside'])
+        self.assertEqual(self.titles(**window, cursor=''), ['spanning', 'inside'])
+        self.assertEqual(self.titles(start='2030-01-01T12:30:00Z'), ['spanning', 'after'])
+        self.assertEqual(self.titles(end='2030-01-01T09:00:00Z'), ['spanning', 'before'])
+
+    def test_invalid_bounds(self):
+        response = self.client.get('/api/events/', {'start': 'tomorrow'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_uses_the_time_window_index(self):
+        query = Event.objects.filter(start_time__lt=at(1, 13), end_time__gt=at(1, 10))
+        with connection.cursor() as cursor:
+            sql, params = query.query.sql_with_params()
+            plan = ' '.join(str(row) for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall())
+        self.assertIn('INDEX', plan.upper())
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from events.recurrence import Rule, occurrences, recurrence_of
+
+from .helpers import at, client_for, make_event
+
+
+def utc(year, month, day, hour=0):
+    return datetime(year, month, day, hour, tzinfo=dt_timezone.utc)
+
+
+class RecurrenceRuleTests(TestCase):
+    def test_recurrence_of(self):
+        self.assertEqual(recurrence_of(True, 'weekly'), 'WEEKLY')
+        self.assertIsNone(recurrence_of(False, 'DAILY'))
+        self.assertIsNone(recurrence_of(True, 'FORTNIGHTLY'))
+        self.assertIsNone(recurrence_of(True, None))
+
+    def test_fixed_steps(self):
+        rule = Rule('DAILY', at(1, 9), at(1, 10))
+        self.assertEqual(list(rule.between(at(3, 9, 30), at(5, 9))), [
+            (at(3, 9), at(3, 10)), (at(4, 9), at(4, 10)),
+        ])
+        self.assertEqual(rule.first_index(at(1, 0)), 0)
+        self.assertEqual(rule.first_index(at(3, 10)), 3)
+
+    def test_months_clamp_to_short_months(self):
+        rule = Rule('MONTHLY', utc(2030, 1, 31, 9), utc(2030, 1, 31, 10))
+        starts = [start for start, _ in rule.between(utc(2030, 1, 1), utc(2030, 5, 1))]
+        self.assertEqual(starts, [utc(2030, 1, 31, 9), utc(2030, 2, 28, 9), utc(2030, 3, 31, 9), utc(2030, 4, 30, 9)])
+
+        yearly = Rule('YEARLY', utc(2028, 2, 29, 9), utc(2028, 2, 29, 10))
+        self.assertEqual(next(yearly.between(utc(2029, 1, 1), utc(2030, 1, 1)))[0], utc(2029, 2, 28, 9))
+
+    def test_far_window_is_computed_directly(self):
+        # the first index comes from arithmetic, not from walking every earlier occurrence
+        rule = Rule('WEEKLY', at(1, 9), at(1, 10))
+        window_start = at(1, 9) + timedelta(weeks=100000)
+        self.assertEqual(next(rule.between(window_start, window_start + timedelta(days=1))), (window_start, window_start + timedelta(hours=1)))
+
+    def test_occurrence_spanning_the_window_start(self):
+        rule = Rule('DAILY', at(1, 22), at(2, 2))
+        self.assertEqual(next(rule.between(at(3, 1), at(4, 0))), (at(2, 22), at(3, 2)))
+
+    def test_one_off(self):
+        self.assertEqual(list(occurrences(at(1, 9), at(1, 10), None, at(1, 0), at(2, 0))), [(at(1, 9), at(1, 10))])
+        self.assertEqual(list(occurrences(at(1, 9), at(1, 10), None, at(1, 10), at(2, 0))), [])
+
+
+class OccurrenceListTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        make_event(self.owner, 'standup', at(1, 9), at(1, 9, 15), is_recurring=True, recurrence_pattern='DAILY')
+        make_event(self.owner, 'review', at(3, 14), at(3, 15))
+
+    def test_window_is_expanded_and_paged(self):
+        window = {'from': '2030-01-02T00:00:00Z', 'to': '2030-01-05T00:00:00Z'}
+        response = self.client.get('/api/events/', {**window, 'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.data['results']], ['standup', 'standup', 'review'])
+        self.assertTrue(response.data['has_next'])
+
+        response = self.client.get('/api/events/', {**window, 'page_size': 3, 'page': 2})
+        self.assertEqual([row['start_time'][:16] for row in response.data['results']], ['2030-01-04 09:00'])
+        self.assertFalse(response.data['has_next'])
+
+    def test_window_must_be_valid(self):
+        response = self.client.get('/api/events/', {'from': '2030-01-05T00:00:00Z', 'to': '2030-01-02T00:00:00Z'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from events.history import IncompleteHistory, rollback_events
+from events.models import Event, HistoricalEvent
+
+from .helpers import at, client_for, make_event
+
+
+def versions_of(event):
+    return list(HistoricalEvent.objects.filter(id=event.id).order_by('history_date', 'history_id'))
+
+
+class BatchRollbackTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        self.first = make_event(self.owner, 'first', at(1, 10), at(1, 11), description='d', location='l')
+        self.second = make_event(self.owner, 'second', at(2, 10), at(2, 11), description='d', location='l')
+        for event in (self.first, self.second):
+            event.title = f"{event.title} renamed"
+            event.end_time += timedelta(hours=1)
+            event.save()
+
+    def test_versions(self):
+        other = make_event(User.objects.create_user('other', password='pw'), 'other', at(3, 10), at(3, 11))
+        response = self.client.post('/api/events/rollback/', {'versions': [
+            {'event_id': self.first.id, 'version_id': versions_of(self.first)[0].history_id},
+            {'event_id': self.second.id, 'version_id': versions_of(self.second)[0].history_id},
+            {'event_id': other.id, 'version_id': versions_of(other)[0].history_id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['title'] for row in response.data['rolled_back']), ['first', 'second'])
+        self.assertEqual(response.data['errors'], [{'event_id': other.id, 'error': 'Event not found or not owned'}])
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.title, self.first.end_time), ('first', at(1, 11)))
+        # the rollback is itself a version
+        self.assertEqual(versions_of(self.first)[-1].title, 'first')
+
+    def test_as_of(self):
+        as_of = versions_of(self.second)[0].history_date
+        response = self.client.post('/api/events/rollback/', {'as_of': as_of.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Event.objects.get(id=self.first.id).title, 'first')
+        self.assertEqual(Event.objects.get(id=self.second.id).title, 'second')
+
+    def test_broken_history_is_not_written_back(self):
+        event = make_event(self.owner, 'third', at(3, 10), at(3, 11), description='d', location='l')
+        with override_settings(EVENT_HISTORY_DELTA=True):
+            event.title = 'third renamed'
+            event.save()
+        HistoricalEvent.objects.filter(id=event.id, history_is_snapshot=True).delete()
+        [delta] = versions_of(event)
+
+        response = self.client.post('/api/events/rollback/', {'versions': [{'event_id': event.id, 'version_id': delta.history_id}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{'event_id': event.id, 'error': "Version can't be rebuilt, its history has no snapshot"}])
+        self.assertEqual(Event.objects.get(id=event.id).title, 'third renamed')
+
+    def test_version_without_title(self):
+        version = versions_of(self.first)[0]
+        HistoricalEvent.objects.filter(history_id=version.history_id).update(title='')
+        response = self.client.post('/api/events/rollback/', {'versions': [{'event_id': self.first.id, 'version_id': version.history_id}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Event.objects.get(id=self.first.id).title, 'first renamed')
+
+        version.title = ''
+        with self.assertRaises(IncompleteHistory):
+            rollback_events([self.first], {self.first.id: version})
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from events.models import Event
+from events.renderers import FastJSONRenderer
+from events.serializers import EVENT_ROW_FIELDS, event_payload, event_row, format_datetime
+
+from .helpers import at, make_event
+
+
+class FastPathTests(TestCase):
+    def test_format_datetime_matches_strftime(self):
+        for value in (at(1, 9), at(1, 9, 30).replace(second=5, microsecond=123456), datetime(2030, 1, 1, 9)):
+            self.assertEqual(format_datetime(value), value.strftime('%Y-%m-%d %H:%M:%S'))
+        self.assertIsNone(format_datetime(None))
+
+    def test_row_and_instance_payloads_match(self):
+        event = make_event(User.objects.create_user('owner', password='pw'), 'event', at(1, 9), at(1, 10), location='here')
+        row = Event.objects.filter(id=event.id).values_list(*EVENT_ROW_FIELDS).get()
+        self.assertEqual(event_row(row), event_payload(Event.objects.get(id=event.id)))
+        self.assertEqual(event_row(row)['start_time'], '2030-01-01 09:00:00')
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_json_as_the_stock_renderer(self):
+        data = {
+            'results': [{'id': 1, 'title': 'café \u2028', 'when': at(1, 9), 'price': Decimal('1.50')}],
+            1: 'non string key',
+        }
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn('\u2028'.encode(), fast)
+
+    def test_indented_output_falls_back(self):
+        data = {'a': [1, 2]}
+        context = {'indent': 2}
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json', context), JSONRenderer().render(data, 'application/json', context))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from events.models import EventParticipant
+
+from .helpers import at, client_for, make_event
+
+
+class ShareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client = client_for(self.owner)
+        self.event = make_event(self.owner, 'event', at(1, 10), at(1, 11))
+        self.url = f'/api/events/{self.event.id}/share/'
+
+    def share(self, users):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'users': users}, format='json')
+
+    def test_queries_dont_grow_with_invitees(self):
+        few = [User.objects.create_user(f'few{i}', password='pw') for i in range(2)]
+        many = [User.objects.create_user(f'many{i}', password='pw') for i in range(20)]
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.share([{'user_id': user.id, 'role': 'VIEWER'} for user in few]).status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.share([{'user_id': user.id, 'role': 'VIEWER'} for user in many]).status_code, 200)
+        self.assertEqual(len(first), len(second))
+        self.assertEqual(EventParticipant.objects.filter(event=self.event).count(), 23)
+
+    def test_upsert_and_response(self):
+        viewer = User.objects.create_user('viewer', password='pw')
+        EventParticipant.objects.create(user=viewer, event=self.event, role='VIEWER')
+        editor = User.objects.create_user('editor', password='pw')
+        response = self.share([
+            {'user_id': viewer.id, 'role': 'EDITOR'},
+            {'user_id': editor.id, 'role': 'EDITOR'},
+            {'user_id': 999999, 'role': 'VIEWER'},  # unknown users are skipped
+            {'user_id': self.owner.id, 'role': 'VIEWER'},  # the caller is never re-added
+        ])
+        self.assertEqual(response.status_code, 200)
+        roles = {p['username']: p['role'] for p in response.data['permissions']}
+        self.assertEqual(roles, {'owner': 'OWNER', 'viewer': 'EDITOR', 'editor': 'EDITOR'})
+        self.assertEqual(dict(EventParticipant.objects.filter(event=self.event).values_list('user__username', 'role')), roles)
+        # the cached participant list was invalidated
+        listed = self.client.get(f'/api/events/{self.event.id}/permissions/').data['participants']
+        self.assertEqual({p['username']: p['role'] for p in listed}, roles)
+
+    def test_invalid_entries_write_nothing(self):
+        invitee = User.objects.create_user('invitee', password='pw')
+        response = self.share([{'user_id': invitee.id, 'role': 'VIEWER'}, {'user_id': invitee.id, 'role': 'ADMIN'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EventParticipant.objects.filter(user=invitee).exists())
+        self.assertEqual(self.client.post(self.url, {'users': 'nope'}, format='json').status_code, 400)
@@ -1,6 +1,7 @@
 from .views import EventView,EventDetailView,BulkEventView,EventHistoryView, EventRollbackView
 from .views import EventShareView, EventPermissionListView, EventPermissionUpdateView, EventHistoryListView
-from .views import EventChangelogView, EventDiffView
+from .views import EventChangelogView, EventDiffView, EventImportView, EventExportView, FreeBusyView, EventBatchRollbackView
+from .async_views import AsyncEventListView, AsyncEventDetailView, AsyncEventPermissionListView
 from django.urls import path
  
  # for all urls here prefix with api/events/
@@ -8,6 +9,14 @@ urlpatterns = [
     path('', EventView.as_view(), name='event_view'),
     path('<int:id>/', EventDetailView.as_view()),
     path('batch/',BulkEventView.as_view(), name='bulk_event'),
+    path('import/', EventImportView.as_view(), name='import_events'),
+    path('export/', EventExportView.as_view(), name='export_events'),
+    path('freebusy/', FreeBusyView.as_view(), name='freebusy'),
+    path('rollback/', EventBatchRollbackView.as_view(), name='batch_rollback'),
+    # async (ASGI) read path, same responses as the sync views above
+    path('async/', AsyncEventListView.as_view(), name='async_event_list'),
+    path('async/<int:id>/', AsyncEventDetailView.as_view(), name='async_event_detail'),
+    path('async/<int:id>/permissions/', AsyncEventPermissionListView.as_view(), name='async_list_permissions'),
     path('<int:id>/share/', EventShareView.as_view(), name='share_event'),
     path('<int:id>/permissions/', EventPermissionListView.as_view(), name='list_permissions'),
     path('<int:id>/permissions/<int:user_id>/', EventPermissionUpdateView.as_view(), name='update_permission'),
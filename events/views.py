@@ -1,32 +1,54 @@
+import heapq
+from datetime import timedelta
+from itertools import islice
+from operator import itemgetter
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated  
-from rest_framework_simplejwt.authentication import JWTAuthentication 
+from rest_framework.settings import api_settings
 from .models import Event, EventParticipant
 from events.models import HistoricalEvent 
 from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from django.db.models import Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger #i always use djangos own paginator
-from django.shortcuts import get_object_or_404
-from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from .serializers import EventSerializer, EventCreateSerializer, EventShareSerializer, BulkEventCreateSerializer
+from .serializers import EVENT_ROW_FIELDS, event_payload, event_row, format_datetime
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from .conflicts import find_batch_conflicts, find_conflicts
+from .recurrence import recurrence_of
+from .occurrences import materialize_new_events, occurrence_streams
+from .export import expand, export_rows, ics_lines, ndjson_lines
+from .history import IncompleteHistory, bulk_create_events, changelog_entries, missing_fields, restore, restore_many, rollback_events, versions_as_of
+from .freebusy import MAX_USERS, MAX_WINDOW, freebusy, visible_user_ids
+from .importing import event_from_data, import_events
+from .pagination import InvalidCursor, keyset_page
+from .permissions import EventRolePermission, OWNER_ROLES, PARTICIPANT_ROLES, get_event_access
+from event_scheduler.sqlite import retry_on_lock
+from .caching import (
+    event_detail_key, get_event_participants, get_event_version, get_or_compute, invalidate_participants,
+    load_event_participants,
+)
 
 
 
 # Create your views here.
 
 
-def check_event_owner(user, event_id):
-        is_owner = EventParticipant.objects.filter(user=user, event_id=event_id, role='OWNER').exists()
-        if is_owner:
-            event = Event.objects.filter(id=event_id).first()
-            return event, True
-        return None, False
+def parse_aware_datetime(value):
+    # query params usually come without an offset, read them in the default timezone
+    parsed = parse_datetime(value) if value else None
+    if parsed and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class EventView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated,]
 
     @swagger_auto_schema(
@@ -55,14 +77,11 @@ class EventView(APIView):
             if not title or not start_time or not end_time:
                 return Response({"error": "Missing required fields: title, start_time, end_time"}, status=status.HTTP_400_BAD_REQUEST)
 
-            overlapping_events = Event.objects.filter(
-                eventparticipant__user=user,
-                start_time__lt=end_time,
-                end_time__gt=start_time
+            conflicts = find_conflicts(
+                [user.id], start_time, end_time, recurrence_pattern=recurrence_of(is_recurring, recurrence_pattern)
             )
-
-            if overlapping_events.exists():
-                return Response({"error": "User has overlapping event(s) during this time"}, status=status.HTTP_400_BAD_REQUEST)
+            if conflicts:
+                return Response({"error": "User has overlapping event(s) during this time", "conflicts": conflicts}, status=status.HTTP_400_BAD_REQUEST)
 
 
             event = Event.objects.create(
@@ -100,6 +119,12 @@ class EventView(APIView):
             openapi.Parameter('title', openapi.IN_QUERY, description="Filter by title", type=openapi.TYPE_STRING, required=False),
             openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER,default=1),
             openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of items per page", type=openapi.TYPE_INTEGER,default=10),
+            openapi.Parameter('start', openapi.IN_QUERY, description="Only events still running at/after this datetime", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('end', openapi.IN_QUERY, description="Only events starting before this datetime", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Keyset pagination on (start_time, id): pass an empty value for the first page, then the returned next/prev. Skips the total count", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('from', openapi.IN_QUERY, description="Expand recurring events from this datetime (needs `to`)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Expand recurring events up to this datetime (needs `from`)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('as_of', openapi.IN_QUERY, description="List the events as they were at this datetime (from the history)", type=openapi.TYPE_STRING, required=False),
         ],
         responses={200: openapi.Response("List of events", EventSerializer(many=True))},
         security=[{'Bearer': []}],
@@ -115,10 +140,37 @@ class EventView(APIView):
             if title:
                 query = query.filter(title__icontains=title)
 
+            # events overlapping [start, end), served by the (start_time, end_time) index
+            raw_start = request.query_params.get('start')
+            raw_end = request.query_params.get('end')
+            range_start = parse_aware_datetime(raw_start)
+            range_end = parse_aware_datetime(raw_end)
+            if (raw_start and not range_start) or (raw_end and not range_end):
+                return Response({"error": "start and end must be valid datetimes"}, status=status.HTTP_400_BAD_REQUEST)
+
+            raw_as_of = request.query_params.get('as_of')
+            if raw_as_of is not None:
+                return self.list_as_of(request, raw_as_of, title, range_start, range_end)
+
+            if range_end:
+                query = query.filter(start_time__lt=range_end)
+            if range_start:
+                query = query.filter(end_time__gt=range_start)
+
+            window_from = request.query_params.get('from')
+            window_to = request.query_params.get('to')
+            if window_from or window_to:
+                return self.list_occurrences(request, query, window_from, window_to)
+
+            cursor = request.query_params.get('cursor')
+            if cursor is not None:
+                return self.list_keyset(request, query, cursor)
+
             page = request.query_params.get('page', 1)
             per_page = request.query_params.get('page_size', 10)
 
-            paginator = Paginator(query, per_page)
+            # tuples instead of model instances, see serializers.event_row; same order as the async list and cursor pages
+            paginator = Paginator(query.order_by('start_time', 'id').values_list(*EVENT_ROW_FIELDS), per_page)
             try:
                 paginated_qs = paginator.page(page)
             except PageNotAnInteger:
@@ -126,16 +178,7 @@ class EventView(APIView):
             except EmptyPage:
                 paginated_qs = []
 
-            data = [{
-                "id": event.id,
-                "title": event.title,
-                "description": event.description,
-                "start_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "location": event.location,
-                "is_recurring": event.is_recurring,
-                "recurrence_pattern": event.recurrence_pattern,
-            } for event in paginated_qs]
+            data = [event_row(row) for row in paginated_qs]
 
             return Response({
                 "results": data,
@@ -146,40 +189,158 @@ class EventView(APIView):
         except Exception as e:
             return Response({"error in gettinggg events": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    def list_as_of(self, request, raw_as_of, title, range_start, range_end):
+        # the user's events as they were at as_of, answered from the history table.
+        # Participation isn't versioned, so the events are the ones the user takes part in now
+        as_of = parse_aware_datetime(raw_as_of)
+        if not as_of:
+            return Response({"error": "as_of must be a valid datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+        versions = versions_as_of(EventParticipant.objects.filter(user=request.user).values('event_id'), as_of)
+        # the timing columns are kept on delta rows too, so the range can stay in the query
+        if range_end:
+            versions = versions.filter(start_time__lt=range_end)
+        if range_start:
+            versions = versions.filter(end_time__gt=range_start)
+        versions = versions.order_by('start_time', 'id')
+        if title:
+            # delta rows have their title column blanked (events/history.py) and only get it
+            # back from restore(), so SQL can only filter the snapshot rows; the delta rows
+            # are restored in one batch and filtered here
+            versions = versions.filter(Q(history_is_snapshot=True, title__icontains=title) | Q(history_is_snapshot=False))
+            versions = [version for version in restore_many(list(versions), skip_incomplete=True) if title.lower() in version.title.lower()]
+
+        page = request.query_params.get('page', 1)
+        per_page = request.query_params.get('page_size', 10)
+        paginator = Paginator(versions, per_page)
+        try:
+            paginated = paginator.page(page)
+        except PageNotAnInteger:
+            paginated = paginator.page(1)
+        except EmptyPage:
+            paginated = []
+        # without a title filter this is a COUNT plus one page of rows, restored with one history query.
+        # Versions whose history has no snapshot to rebuild them from are left out rather than shown blank
+        paginated = restore_many(list(paginated), skip_incomplete=True)
+
+        return Response({
+            "results": [{**event_payload(version), "history_id": version.history_id} for version in paginated],
+            "count": paginator.count,
+            "num_pages": paginator.num_pages,
+            "current_page": int(page),
+            "as_of": as_of,
+        })
+
+    def list_keyset(self, request, query, cursor):
+        # cursor mode: no COUNT(*) and no OFFSET, every page is a range read after/before the cursor row
+        per_page = max(int(request.query_params.get('page_size', 10)), 1)
+        try:
+            rows, next_cursor, prev_cursor = keyset_page(
+                query.values_list(*EVENT_ROW_FIELDS), cursor, per_page,
+                key=itemgetter(EVENT_ROW_FIELDS.index('start_time'), EVENT_ROW_FIELDS.index('id')),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [event_row(row) for row in rows]
+
+        return Response({
+            "results": data,
+            "next": next_cursor,
+            "prev": prev_cursor,
+            "page_size": per_page,
+        })
+
+    def list_occurrences(self, request, query, window_from, window_to):
+        # recurring events are expanded inside [from, to) instead of being listed once
+        window_start = parse_aware_datetime(window_from)
+        window_end = parse_aware_datetime(window_to)
+        if not window_start or not window_end or window_start >= window_end:
+            return Response({"error": "Both from and to are required, as datetimes with from before to"}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = max(int(request.query_params.get('page', 1)), 1)
+        per_page = max(int(request.query_params.get('page_size', 10)), 1)
+
+        rows = query.filter(start_time__lt=window_end).filter(
+            Q(end_time__gt=window_start) | Q(is_recurring=True)
+        ).values('id', 'title', 'description', 'location', 'is_recurring', 'recurrence_pattern', 'start_time', 'end_time')
+
+        # each generator is already sorted, merging them keeps the stream sorted while
+        # only producing the occurrences this page actually needs
+        stream = heapq.merge(*occurrence_streams(rows, window_start, window_end))
+        offset = (page - 1) * per_page
+        page_items = list(islice(stream, offset, offset + per_page + 1))
+
+        data = [{
+            "id": row['id'],
+            "title": row['title'],
+            "description": row['description'],
+            "start_time": format_datetime(start_time),
+            "end_time": format_datetime(end_time),
+            "location": row['location'],
+            "is_recurring": row['is_recurring'],
+            "recurrence_pattern": row['recurrence_pattern'],
+        } for start_time, _, end_time, row in page_items[:per_page]]
+
+        return Response({
+            "results": data,
+            "from": window_start,
+            "to": window_end,
+            "current_page": page,
+            "has_next": len(page_items) > per_page,
+        })
+
 
 
 
 class EventDetailView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {
+        'GET': (PARTICIPANT_ROLES, "Event not present or unauthorized"),
+        'PUT': (OWNER_ROLES, "Not authorized to edit this event"),
+        'DELETE': (OWNER_ROLES, "Not authorized to edit this event"),
+    }
+    event_load_methods = ('PUT', 'DELETE')
+    event_hidden_methods = ('GET',)
 
     # Check if the user is the owner of the event
 
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('as_of', openapi.IN_QUERY, description="Return the event as it was at this datetime (from the history)", type=openapi.TYPE_STRING, required=False),
+        ],
         responses={200: EventSerializer(), 404: "Not Found", 500: "Internal Server Error"},
         security=[{'Bearer': []}],
     )
 
     def get(self, request, id):
         user = request.user
-        cache_key = f"event_detail_view_{id}_user_{user.id}"
+
+        raw_as_of = request.query_params.get('as_of')
+        if raw_as_of is not None:
+            as_of = parse_aware_datetime(raw_as_of)
+            if not as_of:
+                return Response({"error": "as_of must be a valid datetime"}, status=400)
+            version = versions_as_of([id], as_of).first()
+            if version is None:
+                return Response({"error": "Event did not exist at that time"}, status=404)
+            try:
+                restore(version)
+            except IncompleteHistory as e:
+                return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+            return Response({
+                **event_payload(version),
+                "history_id": version.history_id,
+                "history_date": format_datetime(version.history_date),
+            })
 
         try:
-            # data ffrom cache
-            data = cache.get(cache_key)
-            if not data:
-                event = Event.objects.get(id=id, eventparticipant__user=user)
-                data = {
-                    "id": event.id,
-                    "title": event.title,
-                    "description": event.description,
-                    "start_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "end_time": event.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "location": event.location,
-                    "is_recurring": event.is_recurring,
-                    "recurrence_pattern": event.recurrence_pattern,
-                }
-                cache.set(cache_key, data, timeout=86400)  # cache for 1 hour
+            # access was checked by EventRolePermission, the payload itself is shared by all participants
+            # data ffrom cache, the key moves on whenever the event is saved
+            def load():
+                return event_row(Event.objects.filter(id=id).values_list(*EVENT_ROW_FIELDS).get())
+            data = get_or_compute(event_detail_key(id, get_event_version(id)), load)
             return Response(data)
 
         except Event.DoesNotExist:
@@ -196,46 +357,34 @@ class EventDetailView(APIView):
         user = request.user
         data = request.data
 
-        try:
-            event, is_event_owner = check_event_owner(user, id)
-            if not is_event_owner:
-                return Response({"error": "Not authorized to edit this event"}, status=403)
-        except Exception as e:
-            return Response({"error": "Event not found or only owner can edit"}, status=403)
+        event = get_event_access(request, id, load_event=True).event
 
-        start_time = parse_datetime(data.get("start_time")) or event.start_time
-        end_time = parse_datetime(data.get("end_time")) or event.end_time
+        start_time = parse_aware_datetime(data.get("start_time")) or event.start_time
+        end_time = parse_aware_datetime(data.get("end_time")) or event.end_time
+        is_recurring = data.get("is_recurring", event.is_recurring)
+        recurrence_pattern = data.get("recurrence_pattern", event.recurrence_pattern)
         participant_ids = set(
             event.eventparticipant_set.values_list("user_id", flat=True)
         )
 
         # Check for overlaps exc the current event
-        overlapping_events = Event.objects.filter(
-            eventparticipant__user_id__in=participant_ids,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-        ).exclude(id=event.id).distinct()
-
-        if overlapping_events.exists():
-            return Response({"error": "Overlapping event(s) for participant(s)"}, status=400)
+        conflicts = find_conflicts(
+            participant_ids, start_time, end_time,
+            exclude_event_id=event.id, recurrence_pattern=recurrence_of(is_recurring, recurrence_pattern),
+        )
+        if conflicts:
+            return Response({"error": "Overlapping event(s) for participant(s)", "conflicts": conflicts}, status=400)
         event.title = data.get("title", event.title)
         event.description = data.get("description", event.description)
         event.start_time = start_time
         event.end_time = end_time
         event.location = data.get("location", event.location)
-        event.is_recurring = data.get("is_recurring", event.is_recurring)
-        event.recurrence_pattern = data.get("recurrence_pattern", event.recurrence_pattern)
+        event.is_recurring = is_recurring
+        event.recurrence_pattern = recurrence_pattern
         event.save()
 
         return Response({"message": "Event updated successfully","event": {
-                    "id": event.id,
-                    "title": event.title,
-                    "description": event.description,
-                    "start_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "end_time": event.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "location": event.location,
-                    "is_recurring": event.is_recurring,
-                    "recurrence_pattern": event.recurrence_pattern,
+                    **event_payload(event),
                     "owner_id": user.id
                 }}, status=200)
     
@@ -248,20 +397,14 @@ class EventDetailView(APIView):
 )
     def delete(self, request, id):
         user = request.user
-        try:
-            event, is_event_owner = check_event_owner(user, id)
-            if not is_event_owner:
-                return Response({"error": "Not authorized to edit this event"}, status=403)
-        except Event.DoesNotExist:
-            return Response({"error": "Not authorized or event not found"}, status=403)
-
+        event = get_event_access(request, id, load_event=True).event
         event.delete()
         return Response({"message": "Event deleted successfully"})
 
 
 class BulkEventView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
     @swagger_auto_schema(
         request_body=EventShareSerializer,
         security=[{'Bearer': []}],
@@ -272,67 +415,190 @@ class BulkEventView(APIView):
         }
     )
     def post(self,request):   
-        from django.db import transaction
         try:
             user = request.user
             event_data = request.data
             if not isinstance(event_data,list):
                 return Response({"error": "Invalid data format. Expect a list format"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            events_to_create = []
-            participants_to_create = []
-            created_events_response = []
-            errors = [] 
-            with transaction.atomic():
-                for idx,data in enumerate(event_data):
-                    try:
-                        title = data.get('title')
-                        description = data.get('description')
-                        start_time = data.get('start_time')
-                        end_time = data.get('end_time')
-                        location = data.get('location')
-                        is_recurring = data.get('is_recurring', False)
-                        recurrence_pattern = data.get('recurrence_pattern')
-                        if not title or not start_time or not end_time:
-                            raise ValueError("Missing required fields: title, start_time, end_time")
-
-                        event = Event(
-                            title=title,
-                            description=description,
-                            start_time=parse_datetime(start_time),
-                            end_time=parse_datetime(end_time),
-                            location=location,
-                            is_recurring=is_recurring,
-                            recurrence_pattern=recurrence_pattern
-                        )
-                        events_to_create.append(event)
-                    except Exception as e:
-                        errors.append({"error": f"Error in creating event {idx+1}: {str(e)}"})
-
-                created_events = Event.objects.bulk_create(events_to_create)
-
-        # Create eventparticipant owner entries
-                for event in created_events:
-                    participants_to_create.append(EventParticipant(user=user, event=event, role='OWNER'))
-                    created_events_response.append({
-                        "id": event.id,
-                        "title": event.title,
-                        "start_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "end_time": event.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    })
-
-                EventParticipant.objects.bulk_create(participants_to_create)
 
+            created_events_response, errors = self.create_batch(user, event_data)
             return Response({
                 "created_events": created_events_response,
                 "errors": errors
-            }, status=201 if created_events else 400)
+            }, status=201 if created_events_response else 400)
         except Exception as e:  
             return Response({"erroe in bulk event creation ": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class EventShareView(APIView):
+    @retry_on_lock
+    def create_batch(self, user, event_data):
+        # one transaction, rerun from scratch when SQLite reports the database as locked
+        from django.db import transaction
+        candidates = []
+        events_to_create = []
+        participants_to_create = []
+        created_events_response = []
+        errors = [] 
+        with transaction.atomic():
+            for idx,data in enumerate(event_data):
+                try:
+                    candidates.append((idx + 1, event_from_data(data)))
+                except Exception as e:
+                    errors.append({"error": f"Error in creating event {idx+1}: {str(e)}"})
+
+            # one sweep over the sorted batch + one range query for the user's existing events
+            conflicts = find_batch_conflicts(
+                user.id,
+                [
+                    (number, event.start_time, event.end_time, recurrence_of(event.is_recurring, event.recurrence_pattern))
+                    for number, event in candidates
+                ],
+            )
+            for number, event in candidates:
+                if number in conflicts:
+                    errors.append({
+                        "error": f"Error in creating event {number}: {conflicts[number]['message']}",
+                        "conflicts": conflicts[number]["conflicts"],
+                    })
+                else:
+                    events_to_create.append(event)
+
+            # with their "+" history rows, like the per-event save() this replaced
+            created_events = bulk_create_events(events_to_create, user)
+
+    # Create eventparticipant owner entries
+            for event in created_events:
+                participants_to_create.append(EventParticipant(user=user, event=event, role='OWNER'))
+                created_events_response.append({
+                    "id": event.id,
+                    "title": event.title,
+                    "start_time": format_datetime(event.start_time),
+                    "end_time": format_datetime(event.end_time),
+                })
+
+            EventParticipant.objects.bulk_create(participants_to_create)
+            materialize_new_events(created_events)
+        return created_events_response, errors
+
+class EventImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+    @swagger_auto_schema(
+        operation_description="Import events from an NDJSON body (one event object per line). "
+                              "Lines are committed in chunks and the response streams one NDJSON line "
+                              "per rejected line, one progress line per chunk and a final summary.",
+        security=[{'Bearer': []}],
+        responses={200: openapi.Response(description="NDJSON progress stream")},
+    )
+    def post(self, request):
+        # read the raw body line by line, request.data would load all of it
+        stream = request.stream
+        if stream is None:
+            return Response({"error": "Empty body. Expect one JSON event per line"}, status=status.HTTP_400_BAD_REQUEST)
+        return StreamingHttpResponse(import_events(request.user, stream), content_type="application/x-ndjson")
+
+
+class EventExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+    # `format` is taken by DRF's content negotiation, so the export type is `output`
+    OUTPUTS = {
+        'ndjson': (ndjson_lines, "application/x-ndjson", "events.ndjson"),
+        'ics': (ics_lines, "text/calendar; charset=utf-8", "events.ics"),
+    }
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, description="ndjson (default) or ics", type=openapi.TYPE_STRING, enum=['ndjson', 'ics'], required=False),
+            openapi.Parameter('from', openapi.IN_QUERY, description="Only occurrences running at/after this datetime", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Only occurrences starting before this datetime (recurring events stop at the occurrence horizon without it)", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: openapi.Response(description="Streamed events, one line/VEVENT per occurrence")},
+        security=[{'Bearer': []}],
+    )
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson').lower()
+        if output not in self.OUTPUTS:
+            return Response({"error": "output must be one of: " + ", ".join(self.OUTPUTS)}, status=status.HTTP_400_BAD_REQUEST)
+
+        raw_from = request.query_params.get('from')
+        raw_to = request.query_params.get('to')
+        window_start = parse_aware_datetime(raw_from)
+        window_end = parse_aware_datetime(raw_to)
+        if (raw_from and not window_start) or (raw_to and not window_end):
+            return Response({"error": "from and to must be valid datetimes"}, status=status.HTTP_400_BAD_REQUEST)
+
+        write, content_type, filename = self.OUTPUTS[output]
+        rows = export_rows(request.user, window_start, window_end)
+        response = StreamingHttpResponse(write(expand(rows, window_start, window_end)), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class FreeBusyView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('users', openapi.IN_QUERY, description="Comma separated user ids", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('from', openapi.IN_QUERY, description="Window start datetime", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Window end datetime", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('duration', openapi.IN_QUERY, description="Minutes; suggest common free slots of this length", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('slots', openapi.IN_QUERY, description="How many free slots to suggest", type=openapi.TYPE_INTEGER, default=5),
+        ],
+        responses={
+            200: openapi.Response(description="Busy blocks per user, merged busy blocks and free slots"),
+            403: openapi.Response(description="Some users don't share an event with you"),
+        },
+        security=[{'Bearer': []}],
+    )
+    def get(self, request):
+        try:
+            user_ids = sorted({int(user_id) for user_id in request.query_params.get('users', '').split(',') if user_id.strip()})
+            duration = request.query_params.get('duration')
+            duration = timedelta(minutes=int(duration)) if duration else None
+            limit = int(request.query_params.get('slots', 5))
+        except ValueError:
+            return Response({"error": "users, duration and slots must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not user_ids or len(user_ids) > MAX_USERS:
+            return Response({"error": f"Pass between 1 and {MAX_USERS} user ids"}, status=status.HTTP_400_BAD_REQUEST)
+        if (duration is not None and duration.total_seconds() <= 0) or limit < 1:
+            return Response({"error": "duration and slots must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        window_start = parse_aware_datetime(request.query_params.get('from'))
+        window_end = parse_aware_datetime(request.query_params.get('to'))
+        if not window_start or not window_end or window_start >= window_end:
+            return Response({"error": "Both from and to are required, as datetimes with from before to"}, status=status.HTTP_400_BAD_REQUEST)
+        if window_end - window_start > MAX_WINDOW:
+            return Response({"error": f"The window can be at most {MAX_WINDOW.days} days"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # per-user busy blocks are only shown for users the caller already shares an event with
+        hidden = sorted(set(user_ids) - visible_user_ids(request.user, user_ids))
+        if hidden:
+            return Response({"error": "Not authorized to see the calendar of these users", "users": hidden}, status=status.HTTP_403_FORBIDDEN)
+
+        result = freebusy(user_ids, window_start, window_end, duration, limit)
+
+        def blocks(intervals):
+            return [{"start": format_datetime(start_time), "end": format_datetime(end_time)} for start_time, end_time in intervals]
+
+        data = {
+            "from": window_start,
+            "to": window_end,
+            "users": {user_id: blocks(intervals) for user_id, intervals in result["users"].items()},
+            "busy": blocks(result["busy"]),
+        }
+        if "free_slots" in result:
+            data["free_slots"] = blocks(result["free_slots"])
+        return Response(data)
+
+
+class EventShareView(APIView):
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {'POST': (OWNER_ROLES, "Not authorized to share this event")}
 
     @swagger_auto_schema(
         request_body=EventShareSerializer,
@@ -345,6 +611,7 @@ class EventShareView(APIView):
     )
     def post(self, request, id):
         from django.contrib.auth import get_user_model
+        from django.db import transaction
         user = request.user
         data = request.data.get("users", [])
 
@@ -352,35 +619,44 @@ class EventShareView(APIView):
             return Response({"error": "Invalid data format. Expect a list format"}, status=400)
 
         try:
-            event, is_event_owner = check_event_owner(user, id)
-            if not is_event_owner:
-                return Response({"error": "Not authorized to share this event"}, status=403)
-
             valid_roles = ['OWNER', 'EDITOR', 'VIEWER']
             User = get_user_model()
 
+            roles = {}
             for entry in data:
                 user_id = entry.get("user_id")
                 role = entry.get("role")
 
                 if not user_id or role not in valid_roles:
                     return Response({"error": f"Invalid entry: {entry}"}, status=400)
-
-                requested_user = User.objects.filter(id=user_id).first()
-                if not requested_user or requested_user.id == user.id:
-                    continue
-
-                EventParticipant.objects.update_or_create(
-                    event_id=id,
-                    user=requested_user,
-                    defaults={"role": role}
-                )
-
-            participants = EventParticipant.objects.filter(event_id=id).select_related("user")
-            permissions = [
-                {"user_id": p.user.id, "username": p.user.username, "role": p.role}
-                for p in participants
-            ]
+                try:
+                    roles[int(user_id)] = role  # a user listed twice gets the last role, like before
+                except (TypeError, ValueError):
+                    return Response({"error": f"Invalid entry: {entry}"}, status=400)
+            roles.pop(user.id, None)
+
+            # one IN query for every invitee, unknown ids are skipped
+            usernames = dict(User.objects.filter(id__in=roles).values_list("id", "username"))
+            # from the db, the response lists every participant
+            current = {p["user_id"]: p for p in load_event_participants(id)}
+            rows = [EventParticipant(event_id=id, user_id=user_id, role=roles[user_id]) for user_id in usernames]
+
+            @retry_on_lock
+            def write():
+                with transaction.atomic():
+                    EventParticipant.objects.bulk_create(
+                        rows,
+                        update_conflicts=True,
+                        unique_fields=["user", "event"],
+                        update_fields=["role"],
+                    )
+                    # bulk_create skips the save hooks, so invalidate once for the whole batch
+                    transaction.on_commit(lambda: invalidate_participants(id))
+            write()
+
+            for user_id, username in usernames.items():
+                current[user_id] = {"user_id": user_id, "username": username, "role": roles[user_id]}
+            permissions = list(current.values())
 
             return Response({"message": "Event shared successfully", "permissions": permissions}, status=200)
 
@@ -388,30 +664,109 @@ class EventShareView(APIView):
             return Response({"error in sharing event permission": str(e)}, status=400)
 
 class EventPermissionListView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {
+        'GET': (PARTICIPANT_ROLES, "Not authorized to view this event's participants"),
+        'PATCH': (OWNER_ROLES, "Only event owners can update permissions."),
+    }
 
     @swagger_auto_schema(
         security=[{'Bearer': []}],
         responses={200: "List of participants"}
     )
     def get(self, request, id):
-        cache_key = f"event_participants_{id}"
-        data = cache.get(cache_key)
+        data = get_event_participants(id)
+        return Response({"participants": data}, status=200)
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "updates": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                        "user_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "role": openapi.Schema(type=openapi.TYPE_STRING, enum=['OWNER', 'EDITOR', 'VIEWER']),
+                    }),
+                ),
+                "remove": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+            },
+        ),
+        security=[{'Bearer': []}],
+        responses={200: "Permissions updated", 400: "Invalid entry, or the batch would demote you or leave no owner", 403: "Unauthorized"},
+    )
+    def patch(self, request, id):
+        # many PUT/DELETE /permissions/<user_id>/ in one request: one fetch, one
+        # bulk_update, one delete and a single cache invalidation
+        from django.db import transaction
+        updates = request.data.get("updates", [])
+        remove = request.data.get("remove", [])
+        if not isinstance(updates, list) or not isinstance(remove, list):
+            return Response({"error": "Invalid data format. Expect updates and remove as lists"}, status=400)
 
-        if data is None:
-            participants = EventParticipant.objects.filter(event_id=id).select_related("user")
-            data = [
-                {"user_id": p.user.id, "username": p.user.username, "role": p.role}
-                for p in participants
-            ]
-            cache.set(cache_key, data, timeout=86400)
+        roles = {}
+        for entry in updates:
+            try:
+                user_id, role = int(entry["user_id"]), entry["role"]
+            except (KeyError, TypeError, ValueError):
+                return Response({"error": f"Invalid entry: {entry}"}, status=400)
+            if role not in ['OWNER', 'EDITOR', 'VIEWER']:
+                return Response({"error": "Invalid role. Use 'OWNER', 'EDITOR', or 'VIEWER'."}, status=400)
+            roles[user_id] = role
+        try:
+            removed = {int(user_id) for user_id in remove}
+        except (TypeError, ValueError):
+            return Response({"error": "remove must be a list of user ids"}, status=400)
+        if request.user.id in removed:
+            return Response({"error": "Owner cannot remove themselves from the event."}, status=400)
+        if roles.get(request.user.id, 'OWNER') != 'OWNER':
+            return Response({"error": "Owner cannot change their own role."}, status=400)
+        if removed & set(roles):
+            return Response({"error": "A user can't be updated and removed at once."}, status=400)
+
+        participants = {
+            participant.user_id: participant
+            for participant in EventParticipant.objects.filter(event_id=id, user_id__in=set(roles) | removed)
+        }
+        errors = [
+            {"user_id": user_id, "error": "Participant not found for this event."}
+            for user_id in sorted((set(roles) | removed) - set(participants))
+        ]
+        changed = []
+        for user_id, role in roles.items():
+            participant = participants.get(user_id)
+            if participant is not None and participant.role != role:
+                participant.role = role
+                changed.append(participant)
+        removed &= set(participants)
+
+        with transaction.atomic():
+            EventParticipant.objects.bulk_update(changed, ["role"])
+            if removed:
+                EventParticipant.objects.filter(event_id=id, user_id__in=removed).delete()
+            # the caller stays an owner, but two owners demoting each other at once could still leave none
+            if (changed or removed) and not EventParticipant.objects.filter(event_id=id, role='OWNER').exists():
+                transaction.set_rollback(True)
+                return Response({"error": "An event needs at least one owner."}, status=400)
+            if changed or removed:
+                # bulk writes skip the save hooks, so invalidate once for the whole batch
+                transaction.on_commit(lambda: invalidate_participants(id))
 
-        return Response({"participants": data}, status=200)
+        return Response({
+            "message": "Permissions updated",
+            "updated": [{"user_id": user_id, "role": role} for user_id, role in roles.items() if user_id in participants],
+            "removed": sorted(removed),
+            "errors": errors,
+        }, status=200)
 
 class EventPermissionUpdateView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {
+        'PUT': (OWNER_ROLES, "Only event owners can update permissions."),
+        'DELETE': (OWNER_ROLES, "Only the event owner can remove participants."),
+    }
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -426,9 +781,6 @@ class EventPermissionUpdateView(APIView):
     def put(self, request, id, user_id):
         user = request.user
 
-        if not EventParticipant.objects.filter(event_id=id, user=user, role='OWNER').exists():
-            return Response({"error": "Only event owners can update permissions."}, status=403)
-
         participant = EventParticipant.objects.filter(event_id=id, user_id=user_id).first()
         if not participant:
             return Response({"error": "Participant not found for this event."}, status=404)
@@ -453,9 +805,6 @@ class EventPermissionUpdateView(APIView):
     def delete(self, request, id, user_id):
         user = request.user
 
-        if not EventParticipant.objects.filter(event_id=id, user=user, role='OWNER').exists():
-            return Response({"error": "Only the event owner can remove participants."}, status=403)
-
         if user.id == user_id:
             return Response({"error": "Owner cannot remove themselves from the event."}, status=400)
 
@@ -470,57 +819,43 @@ class EventPermissionUpdateView(APIView):
 
 
 class EventHistoryListView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {'GET': (PARTICIPANT_ROLES, "Not authorized to view this event's history")}
 
     @swagger_auto_schema(security=[{'Bearer': []}])
     def get(self, request, id):
-        event = get_object_or_404(Event, id=id)
         print("Ateeb is chkin event history")
         data = []
 
-        # Ensure user has access
-        if not event.participants.filter(id=request.user.id).exists():
-            return Response({"error": "Not authorized to view this event's history"}, status=status.HTTP_403_FORBIDDEN)
-
-        history_versions = event.history.all().order_by("-history_date")
+        history_versions = HistoricalEvent.objects.filter(id=id).order_by("-history_date")
         for version in history_versions:
             data.append({
                 "version_id": version.history_id,
                 "event_id": version.id,
                 "history_type": version.history_type,  # +, ~, -
-                "history_date": version.history_date.strftime("%Y-%m-%d %H:%M:%S")
+                "history_date": format_datetime(version.history_date)
             })
 
         return Response(data, status=status.HTTP_200_OK)
 
 class EventHistoryView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {'GET': (PARTICIPANT_ROLES, "Not authorized to view this event's history")}
 
     @swagger_auto_schema(security=[{'Bearer': []}])
     def get(self, request, id, version_id):
         print("version id", version_id)
-        event = get_object_or_404(Event, id=id)
-        
-        # Check if user has permission to view event history
-        if not event.participants.filter(id=request.user.id).exists():
-            return Response({"error": "Not authorized to view this event's history"}, status=status.HTTP_403_FORBIDDEN)
-        
         try:
-            version = HistoricalEvent.objects.get(id=id, history_id=version_id)        
+            version = restore(HistoricalEvent.objects.get(id=id, history_id=version_id))
         except HistoricalEvent.DoesNotExist:
             return Response({"error": "Version not found"}, status=status.HTTP_404_NOT_FOUND)
+        except IncompleteHistory as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         
         data = {
-            "id": version.id,
-            "title": version.title,
-            "description": version.description,
-            "start_time": version.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": version.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "location": version.location,
-            "is_recurring": version.is_recurring,
-            "recurrence_pattern": version.recurrence_pattern,
+            **event_payload(version),
             "history_date": version.history_date,
             "history_type": version.history_type,  # creatye/updatee\/delete
         }
@@ -528,20 +863,22 @@ class EventHistoryView(APIView):
 
 
 class EventRollbackView(APIView):
-    permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {'POST': (OWNER_ROLES, "Only owner can rollback event")}
+    event_load_methods = ('POST',)
     @swagger_auto_schema(security=[{'Bearer': []}])
     def post(self, request, id, version_id):
-        event = get_object_or_404(Event, id=id)
-        
-        # Only owners can rollback
-        if not event.eventparticipant_set.filter(user=request.user, role='OWNER').exists():
-            return Response({"error": "Only owner can rollback event"}, status=status.HTTP_403_FORBIDDEN)
+        event = get_event_access(request, id, load_event=True).event
 
         try:
-            version = HistoricalEvent.objects.get(id=id, history_id=version_id)        
+            version = restore(HistoricalEvent.objects.get(id=id, history_id=version_id))
         except HistoricalEvent.DoesNotExist:
             return Response({"error": "Version not found"}, status=status.HTTP_404_NOT_FOUND)
+        except IncompleteHistory as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        if missing_fields(version):
+            return Response({"error": f"Version has no {', '.join(missing_fields(version))}"}, status=status.HTTP_409_CONFLICT)
         # Rollback event fields
         event.title = version.title
         event.description = version.description
@@ -554,75 +891,181 @@ class EventRollbackView(APIView):
         return Response({
             "message": "Event rolled back successfully",
             "event": {
-                "id": event.id,
-                "title": event.title,
-                "description": event.description,
-                "start_time": event.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": event.end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "location": event.location,
-                "is_recurring": event.is_recurring,
-                "recurrence_pattern": event.recurrence_pattern,
+                **event_payload(event),
                 "owner_id": request.user.id
             }
         }, status=status.HTTP_200_OK)
 
         
 
-class EventChangelogView(APIView):
+class EventBatchRollbackView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
-    @swagger_auto_schema(security=[{'Bearer': []}])
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    max_events = 1000
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "versions": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                        "event_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "version_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }),
+                    description="Event/version pairs to roll back to",
+                ),
+                "as_of": openapi.Schema(type=openapi.TYPE_STRING, description="Roll back to the state at this datetime instead"),
+                "event_ids": openapi.Schema(
+                    type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                    description="With as_of: only these events (default: every event you own)",
+                ),
+            },
+        ),
+        security=[{'Bearer': []}],
+        responses={200: "Events rolled back", 400: "Validation error"},
+    )
+    def post(self, request):
+        # rollback of many events at once: one query for the events the caller
+        # owns, one for the versions, then a single bulk write (see rollback_events)
+        data = request.data
+        raw_as_of = data.get("as_of")
+        errors = []
+
+        if raw_as_of is not None:
+            as_of = parse_aware_datetime(raw_as_of)
+            if not as_of:
+                return Response({"error": "as_of must be a valid datetime"}, status=400)
+            event_ids = data.get("event_ids")
+            if event_ids is not None and not isinstance(event_ids, list):
+                return Response({"error": "event_ids must be a list"}, status=400)
+            try:
+                requested = None if event_ids is None else {int(event_id) for event_id in event_ids}
+            except (TypeError, ValueError):
+                return Response({"error": "event_ids must be a list of ids"}, status=400)
+        else:
+            pairs = data.get("versions")
+            if not isinstance(pairs, list) or not pairs:
+                return Response({"error": "Send a list of versions or as_of"}, status=400)
+            wanted = {}
+            for entry in pairs:
+                try:
+                    wanted[int(entry["event_id"])] = int(entry["version_id"])
+                except (KeyError, TypeError, ValueError):
+                    return Response({"error": f"Invalid entry: {entry}"}, status=400)
+            requested = set(wanted)
+
+        if requested is not None and len(requested) > self.max_events:
+            return Response({"error": f"At most {self.max_events} events per request"}, status=400)
+
+        owned = Event.objects.filter(eventparticipant__user=request.user, eventparticipant__role__in=OWNER_ROLES)
+        if requested is not None:
+            owned = owned.filter(id__in=requested)
+        events = list(owned[:self.max_events + 1])
+        if len(events) > self.max_events:
+            return Response({"error": f"More than {self.max_events} events, pass event_ids"}, status=400)
+        for event_id in sorted((requested or set()) - {event.id for event in events}):
+            errors.append({"event_id": event_id, "error": "Event not found or not owned"})
+
+        if raw_as_of is not None:
+            found = list(versions_as_of([event.id for event in events], as_of))
+        else:
+            found = HistoricalEvent.objects.filter(history_id__in=[wanted[event.id] for event in events])
+            # a version id of some other event doesn't count
+            found = [version for version in found if wanted.get(version.id) == version.history_id]
+        # a version that can't be rebuilt (no snapshot before it) or lacks a required
+        # field is reported, never copied into the live row
+        versions = {version.id: version for version in restore_many(found, skip_incomplete=True)}
+        found_ids = {version.id for version in found}
+
+        to_roll_back = []
+        for event in events:
+            version = versions.get(event.id)
+            if version is None:
+                error = "Version can't be rebuilt, its history has no snapshot" if event.id in found_ids else "Version not found"
+                errors.append({"event_id": event.id, "error": error})
+            elif missing_fields(version):
+                errors.append({"event_id": event.id, "error": f"Version has no {', '.join(missing_fields(version))}"})
+            else:
+                to_roll_back.append(event)
+
+        rollback_events(to_roll_back, versions, user=request.user)
+        return Response({
+            "rolled_back": [
+                {**event_payload(event), "version_id": versions[event.id].history_id} for event in to_roll_back
+            ],
+            "errors": errors,
+        }, status=200 if to_roll_back else 400)
+
+
+class EventChangelogView(APIView):
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    event_roles = {'GET': (PARTICIPANT_ROLES, "Not authorized")}
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="history_id to continue after; pass an empty value for the first page. Without it the whole changelog is returned as a list", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Entries per page in cursor mode", type=openapi.TYPE_INTEGER, default=50),
+        ],
+        security=[{'Bearer': []}],
+    )
     def get(self, request, id):
-        event = get_object_or_404(Event, id=id)
-
-        if not event.participants.filter(id=request.user.id).exists():
-            return Response({"error": "Not authorized"}, status=403)
-
-        history = list(event.history.all().order_by('history_date'))  # Ascending
-
-        changelog = []
-
-        for i, entry in enumerate(history):
-            changed_fields = {}
-
-            if i > 0:
-                prev = history[i - 1]
-                for field in ['title', 'description', 'start_time', 'end_time', 'location', 'is_recurring', 'recurrence_pattern']:
-                    old = getattr(prev, field)
-                    new = getattr(entry, field)
-                    if old != new:
-                        changed_fields[field] = {
-                            "from": old,
-                            "to": new
-                        }
-
-            changelog.append({
-                "history_id": entry.history_id,
-                "history_date": entry.history_date.strftime("%Y-%m-%d %H:%M:%S"),
-                "history_type": entry.history_type,
-                "changed_by": entry.history_user_id,
-                "change_reason": entry.history_change_reason,
-                "changed_fields": changed_fields,
-            })
+        # the changed fields were stored with each history row when it was written
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            return self.changelog_page(request, id, cursor)
 
+        history = HistoricalEvent.objects.filter(id=id).order_by('history_date', 'history_id')  # Ascending
+        changelog = [self.entry(entry, changed_fields) for entry, changed_fields in changelog_entries(history)]
         return Response(changelog, status=200)
+
+    def changelog_page(self, request, id, cursor):
+        # cursor mode: a range read on history_id after the cursor, the same cost on every page
+        try:
+            after = int(cursor) if cursor else 0
+            per_page = min(max(int(request.query_params.get('page_size', 50)), 1), 500)
+        except ValueError:
+            return Response({"error": "cursor and page_size must be integers"}, status=400)
+
+        history = HistoricalEvent.objects.filter(id=id).order_by('history_id')
+        entries = list(history.filter(history_id__gt=after)[:per_page + 1])
+        has_more = len(entries) > per_page
+        entries = entries[:per_page]
+        previous = None
+        if entries and entries[0].history_delta is None and after:
+            # only rows from before deltas were stored need the version in front of them
+            previous = history.filter(history_id__lt=entries[0].history_id).last()
+
+        return Response({
+            "results": [self.entry(entry, changed_fields) for entry, changed_fields in changelog_entries(entries, previous)],
+            "next": str(entries[-1].history_id) if has_more else None,
+            "page_size": per_page,
+        }, status=200)
+
+    def entry(self, entry, changed_fields):
+        return {
+            "history_id": entry.history_id,
+            "history_date": format_datetime(entry.history_date),
+            "history_type": entry.history_type,
+            "changed_by": entry.history_user_id,
+            "change_reason": entry.history_change_reason,
+            "changed_fields": changed_fields,
+        }
     
 class EventDiffView(APIView):
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated, EventRolePermission]
+    event_roles = {'GET': (PARTICIPANT_ROLES, "Not authorized")}
     @swagger_auto_schema(security=[{'Bearer': []}])
 
     def get(self, request, id, version_id1, version_id2):
-        event = get_object_or_404(Event, id=id)
-
-        if not event.participants.filter(id=request.user.id).exists():
-            return Response({"error": "Not authorized"}, status=403)
-
         try:
-            v1 = HistoricalEvent.objects.get(id=id, history_id=version_id1)
-            v2 = HistoricalEvent.objects.get(id=id, history_id=version_id2)
+            v1 = restore(HistoricalEvent.objects.get(id=id, history_id=version_id1))
+            v2 = restore(HistoricalEvent.objects.get(id=id, history_id=version_id2))
         except HistoricalEvent.DoesNotExist:
             return Response({"error": "One or both versions not found"}, status=404)
+        except IncompleteHistory as e:
+            return Response({"error": str(e)}, status=409)
 
         diff = {}
         fields = ['title', 'description', 'start_time', 'end_time', 'location', 'is_recurring', 'recurrence_pattern']
@@ -0,0 +1,128 @@
+# users/authentication.py
+# JWT authentication helpers shared by the apps.
+#
+# CachedJWTAuthentication (opt-in, JWT_CACHED_USER=true) keeps the few User
+# columns a request needs in the cache for JWT_USER_CACHE_TTL seconds and
+# builds the user from them, so authenticated requests don't query auth_user.
+# The entry is dropped whenever the user is saved or deleted (users/signals.py).
+# It's a real User instance, not a claims-only TokenUser, because the views use
+# request.user as a foreign key value and simple-history records it as history_user.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication for plain async Django views (DRF views are sync only).
+    Token checks are CPU only, the user is loaded with the async ORM so
+    authenticating never takes a thread.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        # same checks as JWTAuthentication.get_user()
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+# everything else is left deferred and loaded from the db on first access
+CACHED_USER_FIELDS = ("id", "username", "first_name", "last_name", "email", "is_active", "is_staff", "is_superuser")
+DEFAULT_USER_CACHE_TTL = 300  # seconds
+
+
+def cached_user_key(user_id):
+    return f"jwt_user_{user_id}"
+
+
+def user_cache_ttl():
+    return getattr(settings, 'JWT_USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """JWTAuthentication that resolves the user from the cache before the database."""
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        entry = cache.get(cached_user_key(user_id))
+        if entry is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = self._entry(user)
+            cache.set(cached_user_key(user_id), entry, timeout=user_cache_ttl())
+        return self._check(self._user(entry), entry, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        entry = await cache.aget(cached_user_key(user_id))
+        if entry is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = self._entry(user)
+            await cache.aset(cached_user_key(user_id), entry, timeout=user_cache_ttl())
+        return self._check(self._user(entry), entry, validated_token)
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _entry(self, user):
+        entry = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        # the revoke check only needs the hash of the password hash, never the hash itself
+        entry["password_md5"] = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None
+        return entry
+
+    def _user(self, entry):
+        # from_db() marks the columns that aren't cached as deferred, so save()
+        # only writes the cached ones and reading e.g. password loads it
+        fields = [f for f in self.user_model._meta.concrete_fields if f.attname in entry]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, [f.attname for f in fields], [entry[f.attname] for f in fields]
+        )
+
+    def _check(self, user, entry, validated_token):
+        # same checks as JWTAuthentication.get_user()
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry["password_md5"]:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
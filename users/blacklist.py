@@ -0,0 +1,51 @@
+# users/blacklist.py
+# Cached lookups for the refresh token blacklist.
+# simple-jwt asks the token_blacklist tables on every refresh and logout. A
+# blacklisted jti is cached until the token expires (after that it's rejected on
+# its exp anyway), so that entry can never be stale. A "not blacklisted" answer
+# is cached for JWT_BLACKLIST_NEGATIVE_TTL seconds only and is overwritten by
+# blacklist(); with a cache that isn't shared between workers, a logout handled
+# by another worker can go unnoticed for that long. The tiered cache never keeps
+# these keys in its per-process tier. `manage.py prune_tokens` keeps the tables
+# themselves small.
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def blacklist_key(jti):
+    return f"jwt_blacklist_{jti}"
+
+
+def negative_ttl():
+    return getattr(settings, 'JWT_BLACKLIST_NEGATIVE_TTL', 30)
+
+
+def token_ttl(token):
+    # seconds until the token expires, at least 1 so the entry is still written
+    return max(int(token.payload["exp"] - time.time()), 1)
+
+
+class CachedRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check is answered from the cache when it can be."""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = cache.get(blacklist_key(jti))
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            cache.set(blacklist_key(jti), blacklisted, timeout=token_ttl(self) if blacklisted else min(negative_ttl(), token_ttl(self)))
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        # replaces a cached "not blacklisted"
+        cache.set(blacklist_key(self.payload[api_settings.JTI_CLAIM]), True, timeout=token_ttl(self))
+        return result
@@ -0,0 +1,84 @@
+# users/hashing.py
+# Password hashing on a small bounded thread pool.
+# PBKDF2 is deliberately slow, and a burst of logins used to run one hash per
+# request thread, pinning every worker. Hashes now run on a pool of
+# PASSWORD_HASH_CONCURRENCY threads per process with at most PASSWORD_HASH_QUEUE
+# more waiting. A request that can't get a slot within PASSWORD_HASH_WAIT
+# seconds gets HashingBusy (503) instead of queueing up behind the others.
+# This bounds CPU, not request threads: the request thread still blocks while it
+# waits for a slot (up to PASSWORD_HASH_WAIT) and then for its hash to finish.
+# Only the hash itself is offloaded: user lookups and saves stay on the request
+# thread (and its db connection/transaction).
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate as django_authenticate, get_user_model, user_login_failed
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_QUEUE = 8
+DEFAULT_WAIT = 5  # seconds
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            concurrency = max(getattr(settings, 'PASSWORD_HASH_CONCURRENCY', DEFAULT_CONCURRENCY), 1)
+            _slots = threading.BoundedSemaphore(concurrency + max(getattr(settings, 'PASSWORD_HASH_QUEUE', DEFAULT_QUEUE), 0))
+            _pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='password-hash')
+    return _pool, _slots
+
+
+def run_hashing(fn, *args):
+    """fn(*args) on the hashing pool, raises HashingBusy when the pool and its queue are full."""
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=getattr(settings, 'PASSWORD_HASH_WAIT', DEFAULT_WAIT)):
+        raise HashingBusy()
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    return run_hashing(make_password, password)
+
+
+def authenticate(request, username, password):
+    """
+    django.contrib.auth.authenticate() for the ModelBackend, with the password
+    check on the hashing pool. Any other AUTHENTICATION_BACKENDS setup goes
+    through django's authenticate() on the request thread, so custom backends
+    aren't skipped.
+    """
+    if list(getattr(settings, 'AUTHENTICATION_BACKENDS', [MODEL_BACKEND])) != [MODEL_BACKEND]:
+        return django_authenticate(request, username=username, password=password)
+
+    User = get_user_model()
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        # hash anyway, like ModelBackend, so unknown usernames take as long as wrong passwords
+        run_hashing(make_password, password)
+        user = None
+
+    if user is not None and run_hashing(check_password, password, user.password) and user.is_active:
+        if identify_hasher(user.password).must_update(user.password):
+            # what check_password()'s setter does, on this thread
+            user.password = hash_password(password)
+            user.save(update_fields=["password"])
+        return user
+
+    user_login_failed.send(sender=__name__, credentials={"username": username}, request=request)
+    return None
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from users.blacklist import CachedRefreshToken
+from users.hashing import hash_password
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -9,7 +12,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
 
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data)
+        # create_user() with the password hashed on the hashing pool (users/hashing.py)
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email')),
+            password=hash_password(validated_data['password']),
+        )
+        user.save()
         return user
 
 class LoginSerializer(serializers.Serializer):
@@ -20,3 +29,8 @@ class CustomTokenRefreshRequestSerializer(serializers.Serializer):
 
     class Meta:
         ref_name = "CustomTokenRefreshRequestSerializer"
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    # blacklist checks through the cache, see users/blacklist.py
+    token_class = CachedRefreshToken
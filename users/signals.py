@@ -0,0 +1,13 @@
+# users/signals.py
+# Drops the cached user of CachedJWTAuthentication when the user changes.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import cached_user_key
+
+
+@receiver([post_save, post_delete], sender=get_user_model(), dispatch_uid='users.drop_cached_user')
+def drop_cached_user(sender, instance, **kwargs):
+    cache.delete(cached_user_key(instance.pk))
@@ -0,0 +1,57 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, cached_user_key
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user', password='pw', email='user@example.com')
+        self.auth = CachedJWTAuthentication()
+
+    def request(self, user=None):
+        token = AccessToken.for_user(user or self.user)
+        return RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_cached_after_the_first_request(self):
+        with CaptureQueriesContext(connection) as first:
+            user, _ = self.auth.authenticate(self.request())
+        self.assertEqual(len(first), 1)
+        with CaptureQueriesContext(connection) as second:
+            user, _ = self.auth.authenticate(self.request())
+        self.assertEqual(len(second), 0)
+        self.assertEqual((user.pk, user.username, user.email), (self.user.pk, 'user', 'user@example.com'))
+
+    def test_async_path_shares_the_entry(self):
+        self.auth.authenticate(self.request())
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = async_to_sync(self.auth.aauthenticate)(self.request())
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_entry_dropped_on_save_and_delete(self):
+        self.auth.authenticate(self.request())
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(cached_user_key(self.user.pk)))
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(self.request())
+
+        other = User.objects.create_user('other', password='pw')
+        request = self.request(other)
+        self.auth.authenticate(request)
+        other.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(request)
+
+    def test_password_hash_is_not_cached(self):
+        self.auth.authenticate(self.request())
+        self.assertNotIn('password', cache.get(cached_user_key(self.user.pk)))
+
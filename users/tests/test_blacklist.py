@@ -0,0 +1,71 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.blacklist import CachedRefreshToken, blacklist_key
+
+
+class BlacklistCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user', password='pw')
+        self.token = CachedRefreshToken.for_user(self.user)
+        self.jti = self.token['jti']
+
+    def refresh(self, token):
+        return APIClient().post('/api/auth/refresh/', {'refresh': str(token)}, format='json')
+
+    def test_valid_token_is_checked_once(self):
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.refresh(self.token).status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.refresh(self.token).status_code, 200)
+        self.assertIs(cache.get(blacklist_key(self.jti)), False)
+        blacklist_queries = lambda queries: [q for q in queries if 'token_blacklist_blacklistedtoken' in q['sql']]
+        self.assertEqual(len(blacklist_queries(first)), 1)
+        self.assertEqual(blacklist_queries(second), [])
+
+    def test_logout_replaces_the_cached_answer(self):
+        self.assertEqual(self.refresh(self.token).status_code, 200)
+        self.assertEqual(APIClient().post('/api/auth/logout/', {'refresh': str(self.token)}, format='json').status_code, 205)
+        self.assertIs(cache.get(blacklist_key(self.jti)), True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh(self.token).status_code, 401)
+        self.assertEqual(len(queries), 0)
+
+    def test_db_answers_when_nothing_is_cached(self):
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=self.jti))
+        with self.assertRaises(TokenError):
+            CachedRefreshToken(str(self.token)).check_blacklist()
+
+    @override_settings(JWT_BLACKLIST_NEGATIVE_TTL=0)
+    def test_negative_answers_can_be_turned_off(self):
+        CachedRefreshToken(str(self.token)).check_blacklist()
+        self.assertIsNone(cache.get(blacklist_key(self.jti)))
+
+
+class PruneTokensTests(TestCase):
+    def test_prunes_expired_tokens(self):
+        user = User.objects.create_user('user', password='pw')
+        expired = [CachedRefreshToken.for_user(user) for _ in range(3)]
+        live = CachedRefreshToken.for_user(user)
+        OutstandingToken.objects.exclude(jti=live['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+        for token in expired[:2]:
+            token.blacklist()
+        live.blacklist()
+
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn("Pruned 3 expired token(s), 2 of them blacklisted", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
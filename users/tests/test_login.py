@@ -0,0 +1,125 @@
+import threading
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users import hashing
+from users.throttling import TokenBucketThrottle
+
+
+class OnlyAliceBackend:
+    # a backend the pooled ModelBackend path knows nothing about
+    def authenticate(self, request, username=None, password=None):
+        if username == 'alice':
+            return User.objects.get(username='alice')
+        return None
+
+    def get_user(self, user_id):
+        return User.objects.filter(pk=user_id).first()
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('bob', password='correct horse')
+        self.client = APIClient()
+
+    def login(self, username, password, **extra):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': password}, format='json', **extra)
+
+    def test_login(self):
+        response = self.login('bob', 'correct horse')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], {'id': self.user.id, 'username': 'bob'})
+        self.assertEqual(self.login('bob', 'wrong').status_code, 401)
+        self.assertEqual(self.login('nobody', 'wrong').status_code, 401)
+
+    def test_register_does_not_log_the_request(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            response = self.client.post('/api/auth/register/', {
+                'username': 'carol', 'email': 'carol@example.com', 'password': 'a secret pw 123',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn('a secret pw 123', out.getvalue())
+        self.assertTrue(User.objects.get(username='carol').check_password('a secret pw 123'))
+
+    @override_settings(AUTHENTICATION_BACKENDS=['users.tests.test_login.OnlyAliceBackend'])
+    def test_other_backends_are_used(self):
+        User.objects.create_user('alice', password='irrelevant')
+        self.assertEqual(self.login('alice', 'anything').status_code, 200)
+        self.assertEqual(self.login('bob', 'correct horse').status_code, 401)
+
+
+class HashingPoolTests(TestCase):
+    def setUp(self):
+        self.reset_pool()
+        self.addCleanup(self.reset_pool)
+
+    def reset_pool(self):
+        if hashing._pool is not None:
+            hashing._pool.shutdown(wait=True)
+        hashing._pool = hashing._slots = None
+
+    def test_runs_on_the_pool(self):
+        self.assertTrue(hashing.run_hashing(lambda: threading.current_thread().name).startswith('password-hash'))
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_WAIT=0.05)
+    def test_busy_when_the_pool_and_queue_are_full(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        holder = threading.Thread(target=hashing.run_hashing, args=(slow,))
+        holder.start()
+        self.addCleanup(holder.join)
+        self.addCleanup(release.set)
+        started.wait(5)
+        with self.assertRaises(hashing.HashingBusy):
+            hashing.run_hashing(lambda: None)
+
+        User.objects.create_user('bob', password='correct horse')
+        response = APIClient().post('/api/auth/login/', {'username': 'bob', 'password': 'correct horse'}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('bob', password='correct horse')
+        self.now = 1000.0
+        for patcher in (
+            mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {'login_ip': '100/min', 'login_username': '2/min'}),
+            mock.patch.object(TokenBucketThrottle, 'timer', lambda throttle: self.now),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def login(self, username, ip='10.0.0.1'):
+        return APIClient().post('/api/auth/login/', {'username': username, 'password': 'wrong'}, format='json', REMOTE_ADDR=ip)
+
+    def test_username_bucket_refills(self):
+        self.assertEqual(self.login('bob').status_code, 401)
+        self.assertEqual(self.login('bob', ip='10.0.0.2').status_code, 401)
+        response = self.login('BOB ', ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # other usernames have their own bucket
+        self.assertEqual(self.login('alice').status_code, 401)
+
+        self.now += 30
+        self.assertEqual(self.login('bob').status_code, 401)
+        self.assertEqual(self.login('bob').status_code, 429)
+
+    def test_scopes_without_a_rate_are_not_throttled(self):
+        for i in range(5):
+            response = APIClient().post('/api/auth/register/', {'username': f'user{i}', 'password': 'x'}, format='json')
+            self.assertNotEqual(response.status_code, 429)
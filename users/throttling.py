@@ -0,0 +1,61 @@
+# users/throttling.py
+# Token bucket throttles for the credential endpoints.
+# Every client gets a bucket of N tokens that refills at N per period (the DRF
+# rate format, e.g. "10/min"), so short bursts pass and sustained traffic is
+# held to the rate. One bucket per IP and one per username, so neither one
+# address trying many accounts nor many addresses trying one account can keep
+# the hashing pool (users/hashing.py) busy. Rates come from
+# REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] as "<view.throttle_scope>_ip" and
+# "<view.throttle_scope>_username"; a scope without a rate isn't throttled.
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    scope_suffix = None
+
+    def __init__(self):
+        # the scope depends on the view, it's resolved in allow_request() (like ScopedRateThrottle)
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = f"{getattr(view, 'throttle_scope', None)}_{self.scope_suffix}"
+        if self.scope not in self.THROTTLE_RATES:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        self.tokens = min(self.num_requests, tokens + (now - updated) * self.num_requests / self.duration)
+        if self.tokens < 1:
+            return False
+        # an entry that's gone is a full bucket, so it only has to live until it would be full again
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    scope_suffix = "ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    scope_suffix = "username"
+
+    def get_cache_key(self, request, view):
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        if not isinstance(username, str) or not username:
+            return None
+        ident = hashlib.sha256(username.strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
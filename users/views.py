@@ -1,24 +1,36 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.blacklist import CachedRefreshToken
 from users.serializers import RegisterSerializer, LoginSerializer
 from django.contrib.auth.models import User
 from rest_framework.permissions import AllowAny
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers
 from users.serializers import CustomTokenRefreshRequestSerializer
+from users.hashing import HashingBusy, authenticate
+from users.throttling import IPTokenBucketThrottle, UsernameTokenBucketThrottle
+
+
+def hashing_busy_response():
+    return Response(
+        {'detail': 'Too many sign-ins in progress, try again shortly'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'},
+    )
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'register'
     @swagger_auto_schema(request_body=RegisterSerializer)
     def post(self, request):
-        print("myrequestttt", request.data)
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            try:
+                user = serializer.save()
+            except HashingBusy:
+                return hashing_busy_response()
+            refresh = CachedRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -28,16 +40,22 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'login'
     @swagger_auto_schema(request_body=LoginSerializer)
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
-            user = authenticate(
-                username=serializer.validated_data['username'],
-                password=serializer.validated_data['password']
-            )
+            try:
+                user = authenticate(
+                    request,
+                    username=serializer.validated_data['username'],
+                    password=serializer.validated_data['password']
+                )
+            except HashingBusy:
+                return hashing_busy_response()
             if user:
-                refresh = RefreshToken.for_user(user)
+                refresh = CachedRefreshToken.for_user(user)
                 return Response({
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
@@ -52,7 +70,7 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = CachedRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e: